@@ -3,8 +3,12 @@ Callback handlers for inline keyboard interactions
 """
 
 import os
+import sys
+import asyncio
+import functools
 import logging
-from datetime import datetime
+from collections import defaultdict
+from types import MappingProxyType
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
@@ -12,183 +16,504 @@ from telegram.constants import ParseMode
 from config.config import BotConfig
 from utils.security import SecurityManager
 
+_LOGGER = logging.getLogger(__name__)
+
+
+# Static texts used by the inline menus. Built once at import time so the
+# triple-quoted strings are not re-created on every callback.
+_HELP_TEXT = """
+📚 <b>Quick Help</b>
+
+📸 <b>Images:</b> Send photos → Convert to PDF
+📄 <b>PDFs:</b> Send PDF → Extract as images
+📝 <b>Documents:</b> Send DOCX/XLSX → Convert to PDF
+📝 <b>Custom Names:</b> Click "📝 Custom Name" before converting
+
+<b>Commands:</b>
+/start - Main menu
+/help - Detailed help
+/stats - Your statistics
+/settings - Preferences
+/clear - Clear session
+/cancel - Cancel custom naming
+
+<b>Tips:</b> Send multiple images for batch conversion!
+        """
+
+_FORMATS_TEXT = """
+📋 <b>Supported Formats</b>
+
+📸 <b>Images:</b> JPG, PNG, GIF, BMP, TIFF → PDF
+📄 <b>Documents:</b> PDF ↔ Images
+📝 <b>Word:</b> DOCX, DOC → PDF
+📊 <b>Excel:</b> XLSX, XLS → PDF (Enhanced!)
+📄 <b>Text:</b> TXT, HTML, MD → PDF
+
+<b>Max file size:</b> 50MB
+<b>Max images per PDF:</b> 50
+
+✨ <b>New:</b> Custom filenames supported!
+        """
+
+_WELCOME_TEXT = """
+🚀 <b>Advanced Document Converter</b>
+
+Ready to convert your files!
+
+Send me any supported file to get started.
+        """
+
+@functools.lru_cache(maxsize=256)
+def _btn(text: str, callback_data: str) -> InlineKeyboardButton:
+    """Interned InlineKeyboardButton factory.
+
+    The bot only ever uses a few dozen distinct buttons, so dynamic
+    keyboards can share one immutable instance per (text, callback_data).
+    """
+    return InlineKeyboardButton(text, callback_data=callback_data)
+
+
+# Static keyboard markups. These never change between callbacks, so building
+# them once avoids re-allocating the button/markup trees on every press.
+_MARKUP_BACK_MAIN = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]]
+)
+
+_MARKUP_MAIN = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📚 Help", callback_data="show_help"),
+     InlineKeyboardButton("🎛️ Settings", callback_data="show_settings")],
+    [InlineKeyboardButton("📊 Stats", callback_data="show_stats"),
+     InlineKeyboardButton("📋 Formats", callback_data="show_formats")],
+    [InlineKeyboardButton("🧹 Clear Session", callback_data="clear_session")]
+])
+
+@functools.lru_cache(maxsize=8)
+def _build_quality_markup(current: str):
+    """Build the quality selection text and markup for the given selection.
+
+    There are only four quality states, so the rendered menus are memoized
+    instead of re-allocating buttons and re-formatting the text per press.
+    """
+    keyboard = [
+        [InlineKeyboardButton(f"📉 Low {'✅' if current == 'low' else ''}", callback_data="quality_low"),
+         InlineKeyboardButton(f"📊 Medium {'✅' if current == 'medium' else ''}", callback_data="quality_medium")],
+        [InlineKeyboardButton(f"📈 High {'✅' if current == 'high' else ''}", callback_data="quality_high"),
+         InlineKeyboardButton(f"🚀 Ultra {'✅' if current == 'ultra' else ''}", callback_data="quality_ultra")],
+        [InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings")]
+    ]
+
+    quality_info = f"""
+📸 <b>Select Image Quality</b>
+
+Current: <b>{current.title()}</b>
+
+📉 <b>Low (72 DPI)</b>
+• Fastest processing
+• Smallest file size
+• Basic quality
+
+📊 <b>Medium (150 DPI)</b>
+• Balanced speed/quality
+• Good for most uses
+• Recommended default
+
+📈 <b>High (300 DPI)</b>
+• Higher quality
+• Larger file size
+• Better for printing
+
+🚀 <b>Ultra (600 DPI)</b>
+• Maximum quality
+• Largest file size
+• Professional quality
+            """
+
+    return quality_info, InlineKeyboardMarkup(keyboard)
+
+
+@functools.lru_cache(maxsize=8)
+def _build_format_markup(current: str):
+    """Build the output-format selection text and markup (memoized)"""
+    keyboard = [
+        [InlineKeyboardButton(f"PNG {'✅' if current == 'PNG' else ''}", callback_data="format_PNG"),
+         InlineKeyboardButton(f"JPEG {'✅' if current == 'JPEG' else ''}", callback_data="format_JPEG")],
+        [InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings")]
+    ]
+
+    text = (
+        f"🖼️ <b>Select Output Format</b>\n\nCurrent: <b>{current}</b>\n\n"
+        "• PNG: Lossless, larger files\n• JPEG: Compressed, smaller files"
+    )
+
+    return text, InlineKeyboardMarkup(keyboard)
+
+
+# Read-only default settings; new/legacy users get a mutable copy, so the
+# settings keys are always present and can be read by plain subscript.
+_DEFAULT_SETTINGS = MappingProxyType({'quality': 'medium', 'format': 'PNG', 'auto_enhance': False})
+
+# Temporary per-user keys dropped when a session is cleared
+_CLEARABLE_KEYS = ('current_pdf', 'current_word', 'current_excel', 'current_text',
+                   'pending_conversion', 'custom_filename')
+
+@functools.lru_cache(maxsize=8)
+def _quality_set_text(quality: str) -> str:
+    """Confirmation text shown after a quality change (memoized)"""
+    return (
+        f"📸 <b>Quality set to {quality.title()}!</b>\n\n"
+        "This setting will be used for all future conversions."
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _format_set_text(format_type: str) -> str:
+    """Confirmation text shown after a format change (memoized)"""
+    return (
+        f"🖼️ <b>Format set to {format_type}!</b>\n\n"
+        "This will be used for PDF to images conversion."
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _render_stats(conversions: int, files_processed: int, queued: int) -> str:
+    """Render the inline stats text (memoized per state tuple)"""
+    return f"""
+📊 <b>Your Statistics</b>
+
+🔄 Conversions: {conversions}
+📁 Files Processed: {files_processed}
+📸 Images in Queue: {queued}
+
+🏆 Keep converting!
+        """
+
+
+@functools.lru_cache(maxsize=64)
+def _render_settings(quality: str, fmt: str, auto_enhance: bool) -> str:
+    """Render the inline settings text (memoized per state tuple)"""
+    return f"""
+🎛️ <b>Current Settings</b>
+
+📸 Quality: <b>{quality.title()}</b>
+🖼️ Format: <b>{fmt}</b>
+✨ Auto-Enhance: <b>{'On' if auto_enhance else 'Off'}</b>
+
+Click below to change settings:
+        """
+
+
+# Both auto-enhance toggle outcomes, keyed by the new value
+_AUTO_ENHANCE_TEXTS = {
+    True: "✨ <b>Auto-enhance Enabled!</b>\n\nImages will be automatically enhanced before PDF conversion.",
+    False: "✨ <b>Auto-enhance Disabled!</b>\n\nImages will be converted without enhancement before PDF conversion.",
+}
+
+_MARKUP_BACK_SETTINGS = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings")]]
+)
+
+_MARKUP_QUALITY_SET = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings"),
+     InlineKeyboardButton("📄 Convert Images Now", callback_data="convert_images_pdf")]
+])
+
+_MARKUP_IMAGE_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
+    [InlineKeyboardButton("📸 Add More", callback_data="add_more"),
+     InlineKeyboardButton("🎨 Enhance", callback_data="enhance_menu")],
+    [InlineKeyboardButton("👁️ Preview", callback_data="preview_images"),
+     InlineKeyboardButton("⚙️ Settings", callback_data="conversion_settings")],
+    [InlineKeyboardButton("🗑️ Clear All", callback_data="clear_images"),
+     InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+])
+
+_MARKUP_SETTINGS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📸 Quality", callback_data="setting_quality"),
+     InlineKeyboardButton("🖼️ Format", callback_data="setting_format")],
+    [InlineKeyboardButton("✨ Auto-Enhance", callback_data="setting_auto_enhance")],
+    [InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]
+])
+
+_MARKUP_CONVERSION_SETTINGS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📸 Quality", callback_data="setting_quality"),
+     InlineKeyboardButton("🖼️ Format", callback_data="setting_format")],
+    [InlineKeyboardButton("✨ Auto-Enhance", callback_data="setting_auto_enhance")],
+    [InlineKeyboardButton("🔙 Back", callback_data="back_to_images")]
+])
+
+_MARKUP_PDF_SETTINGS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📸 Change Quality", callback_data="setting_quality"),
+     InlineKeyboardButton("🖼️ Change Format", callback_data="setting_format")],
+    [InlineKeyboardButton("🔙 Back", callback_data="convert_pdf_images")]
+])
+
+_MARKUP_PREVIEW = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
+    [InlineKeyboardButton("🔙 Back", callback_data="back_to_images")]
+])
+
+_MARKUP_PREVIEW_EMPTY = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("🔙 Back", callback_data="back_to_main")]]
+)
+
+_MARKUP_ENHANCE_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔆 Brightness", callback_data="enhance_brightness"),
+     InlineKeyboardButton("🌟 Contrast", callback_data="enhance_contrast")],
+    [InlineKeyboardButton("📏 Sharpness", callback_data="enhance_sharpness"),
+     InlineKeyboardButton("🎨 Auto Enhance", callback_data="enhance_auto")],
+    [InlineKeyboardButton("⚫ Grayscale", callback_data="enhance_grayscale"),
+     InlineKeyboardButton("🔙 Back", callback_data="back_to_images")]
+])
+
 
 class CallbackHandlers:
     """Handles all callback query interactions"""
-    
+
+    __slots__ = ('config', 'user_data', 'security',
+                 '_prefix_handlers', '_general_handlers',
+                 '_pending_edits', '_drain_task', '_inflight_edit', '_user_locks')
+
     def __init__(self, config: BotConfig, user_data: dict, security: SecurityManager):
         self.config = config
         self.user_data = user_data
         self.security = security
-        self.logger = logging.getLogger(__name__)
+
+        # O(1) dispatch tables instead of if/elif prefix chains
+        self._prefix_handlers = {
+            'convert_': self.handle_conversion_callbacks,
+            'enhance_': self.handle_enhancement_callbacks,
+            'setting_': self.handle_settings_callbacks,
+            'quality_': self.handle_settings_callbacks,
+            'format_': self.handle_settings_callbacks,
+            'show_': self.handle_show_callbacks,
+        }
+        # Pending message edits keyed by (chat_id, message_id). A newer edit
+        # for the same message supersedes the queued one, and a single drain
+        # task sends them paced under Telegram's bot-wide rate limit.
+        self._pending_edits = {}
+        self._drain_task = None
+        # (key, done-event) while the drain task has an edit on the wire,
+        # so flush_edits can wait out an in-flight round-trip
+        self._inflight_edit = None
+        # Per-user locks: serialize read-modify-write on a user's state while
+        # leaving different users free to run concurrently.
+        self._user_locks = defaultdict(asyncio.Lock)
+        self._general_handlers = {
+            'clear_session': self._on_clear_session,
+            'clear_images': self._on_clear_images,
+            'add_more': self._on_add_more,
+            'preview_images': self._on_preview_images,
+            'conversion_settings': self._on_conversion_settings,
+            'back_to_main': self._on_back_to_main,
+            'back_to_images': self._on_back_to_images,
+            'pdf_info': self._on_info_request,
+            'word_info': self._on_info_request,
+            'excel_info': self._on_info_request,
+            'text_info': self._on_info_request,
+            'pdf_settings': self._on_pdf_settings,
+            'extract_text': self._on_extract_text,
+        }
     
+    # No cache_time on the ack: every button here edits the message, so a
+    # client-side cached answer would swallow repeat presses (Main -> Help
+    # -> Main -> Help) without the bot ever seeing them.
+    def _answer_in_background(self, query):
+        """Schedule query.answer() without blocking the handler on the RTT"""
+        task = asyncio.create_task(query.answer())
+        task.add_done_callback(self._log_task_exception)
+
+    def _log_task_exception(self, task):
+        """Surface failures from fire-and-forget tasks"""
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.warning("Background callback answer failed: %s", task.exception())
+
+    # Telegram caps bots at ~30 messages/second bot-wide; pace edits under it
+    _EDIT_INTERVAL = 1 / 30
+
+    # Settle time for bursty settings toggles: a user flipping quality a few
+    # times in quick succession gets one edit with the final state instead of
+    # one API call per tap.
+    _TOGGLE_DEBOUNCE = 0.25
+
+    # Drop idle per-user locks once the table grows past this size
+    _MAX_USER_LOCKS = 10000
+
+    def _prune_user_locks(self):
+        """Bound the lock table by dropping locks nobody is holding"""
+        if len(self._user_locks) > self._MAX_USER_LOCKS:
+            for uid in [uid for uid, lock in self._user_locks.items() if not lock.locked()]:
+                del self._user_locks[uid]
+
+    def _edit(self, query, text, debounce=0.0, **kwargs):
+        """Queue an edit_message_text call, coalescing edits per message.
+
+        Only the latest pending edit per (chat_id, message_id) is sent —
+        Telegram would have overwritten superseded ones anyway. A non-zero
+        ``debounce`` holds the edit back for that many seconds so rapid
+        re-edits of the same message (e.g. settings toggles) collapse into
+        one API call carrying the final state. Plain synchronous enqueue:
+        handlers don't pay a coroutine/await cycle for it, and the drain
+        task owns the HTTP round-trip and logs failures.
+        """
+        key = (query.message.chat_id, query.message.message_id)
+        not_before = asyncio.get_running_loop().time() + debounce if debounce else 0.0
+        self._pending_edits[key] = (query, text, kwargs, not_before)
+
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain_edits())
+
+    async def flush_edits(self, chat_id, message_id):
+        """Establish ordering between the queue and a direct edit.
+
+        Callers that edit a message outside the queue (main.py's conversion
+        and info flows) must call this first: the queued edit for the key is
+        discarded — the direct edit supersedes it — and if the drain task
+        already has that edit on the wire, the round-trip is awaited so the
+        two edits cannot race each other onto separate pooled connections.
+        """
+        key = (chat_id, message_id)
+        self._pending_edits.pop(key, None)
+        inflight = self._inflight_edit
+        if inflight is not None and inflight[0] == key:
+            await inflight[1].wait()
+
+    async def _drain_edits(self):
+        """Send queued edits in order, paced under the bot-wide rate limit"""
+        while self._pending_edits:
+            # Prefer the edit that becomes eligible first so a debounced
+            # entry never holds up edits for other messages.
+            key = min(self._pending_edits, key=lambda k: self._pending_edits[k][3])
+            delay = self._pending_edits[key][3] - asyncio.get_running_loop().time()
+            if delay > 0:
+                # Re-check after the settle window: a newer tap may have
+                # replaced the entry (and pushed its not-before forward).
+                await asyncio.sleep(delay)
+                continue
+            query, text, kwargs, _ = self._pending_edits.pop(key)
+            self._inflight_edit = (key, asyncio.Event())
+            try:
+                await query.edit_message_text(text, **kwargs)
+            except Exception as e:
+                _LOGGER.warning("Coalesced edit failed for %s: %s", key, e)
+            finally:
+                self._inflight_edit[1].set()
+                self._inflight_edit = None
+            if self._pending_edits:
+                await asyncio.sleep(self._EDIT_INTERVAL)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Enhanced callback handling with all buttons working"""
         query = update.callback_query
-        await query.answer()
-        
         user_id = query.from_user.id
         data = query.data
+        # Answer concurrently with the handler work so the Telegram ack
+        # round-trip is not serialized ahead of the actual routing.
+        self._answer_in_background(query)
         
         try:
-            # Route callbacks to appropriate handlers
-            if data.startswith("convert_"):
-                await self.handle_conversion_callbacks(query, context, data)
-            elif data.startswith("enhance_"):
-                await self.handle_enhancement_callbacks(query, context, data)
-            elif data.startswith("setting_") or data.startswith("quality_") or data.startswith("format_"):
-                await self.handle_settings_callbacks(query, context, data)
-            elif data.startswith("show_"):
-                await self.handle_show_callbacks(query, context, data)
-            else:
-                await self.handle_general_callbacks(query, context, data)
-                
+            # Route callbacks via the prefix dispatch table. The data string
+            # is scanned once here; sub-handlers get the ready-made suffix
+            # instead of re-stripping the prefix themselves. The per-user
+            # lock keeps two quick presses from the same user from
+            # interleaving their state writes.
+            head, _, suffix = data.partition('_')
+            # Intern the short action token: the same few suffixes arrive on
+            # every tap and several handlers store them as dict keys, so
+            # interning turns later key comparisons into pointer checks.
+            suffix = sys.intern(suffix)
+            handler = self._prefix_handlers.get(head + '_', self.handle_general_callbacks)
+            async with self._user_locks[user_id]:
+                await handler(query, context, data, suffix)
+            self._prune_user_locks()
+
         except Exception as e:
-            self.logger.error(f"Error in callback handler for user {user_id}, data: {data}: {e}")
-            await query.edit_message_text("❌ An error occurred. Please try again.")
+            _LOGGER.error("Error in callback handler for user %s, data: %s: %s",
+                              user_id, data, e, exc_info=True)
+            self._edit(query, "❌ An error occurred. Please try again.")
 
-    async def handle_conversion_callbacks(self, query, context, data):
+    async def handle_conversion_callbacks(self, query, context, data, suffix):
         """Handle conversion-related callbacks"""
         # Store the conversion request for the main bot to handle
         user_id = query.from_user.id
-        conversion_type = data.replace('convert_', '')
-        self.user_data[user_id]['requested_conversion'] = conversion_type
+        self.user_data[user_id]['requested_conversion'] = suffix
         
-        await query.edit_message_text("🔄 Conversion requested! Processing...")
+        self._edit(query, "🔄 Conversion requested! Processing...")
 
-    async def handle_enhancement_callbacks(self, query, context, data):
+    async def handle_enhancement_callbacks(self, query, context, data, suffix):
         """Handle image enhancement callbacks"""
-        if data == "enhance_menu":
-            keyboard = [
-                [InlineKeyboardButton("🔆 Brightness", callback_data="enhance_brightness"),
-                 InlineKeyboardButton("🌟 Contrast", callback_data="enhance_contrast")],
-                [InlineKeyboardButton("📏 Sharpness", callback_data="enhance_sharpness"),
-                 InlineKeyboardButton("🎨 Auto Enhance", callback_data="enhance_auto")],
-                [InlineKeyboardButton("⚫ Grayscale", callback_data="enhance_grayscale"),
-                 InlineKeyboardButton("🔙 Back", callback_data="back_to_images")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
+        if suffix == "menu":
+            self._edit(query,
                 "🎨 Choose enhancement type:",
-                reply_markup=reply_markup
+                reply_markup=_MARKUP_ENHANCE_MENU
             )
-        elif data.startswith("enhance_"):
-            enhancement_type = data.replace("enhance_", "")
+        else:
             user_id = query.from_user.id
-            self.user_data[user_id]['requested_enhancement'] = enhancement_type
-            await query.edit_message_text(f"🎨 {enhancement_type.title()} enhancement requested!")
+            self.user_data[user_id]['requested_enhancement'] = suffix
+            self._edit(query, f"🎨 {suffix.title()} enhancement requested!")
 
-    async def handle_settings_callbacks(self, query, context, data):
+    async def handle_settings_callbacks(self, query, context, data, suffix):
         """Handle settings callbacks including quality selection"""
         user_id = query.from_user.id
         
+        settings = self.user_data[user_id].setdefault('settings', dict(_DEFAULT_SETTINGS))
+
         if data == "setting_quality":
             # Show quality selection menu
-            current_quality = self.user_data[user_id]['settings'].get('quality', 'medium')
-            
-            keyboard = [
-                [InlineKeyboardButton(f"📉 Low {'✅' if current_quality == 'low' else ''}", callback_data="quality_low"),
-                 InlineKeyboardButton(f"📊 Medium {'✅' if current_quality == 'medium' else ''}", callback_data="quality_medium")],
-                [InlineKeyboardButton(f"📈 High {'✅' if current_quality == 'high' else ''}", callback_data="quality_high"),
-                 InlineKeyboardButton(f"🚀 Ultra {'✅' if current_quality == 'ultra' else ''}", callback_data="quality_ultra")],
-                [InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            quality_info = f"""
-📸 *Select Image Quality*
-
-Current: *{current_quality.title()}*
-
-📉 *Low (72 DPI)*
-• Fastest processing
-• Smallest file size
-• Basic quality
-
-📊 *Medium (150 DPI)*
-• Balanced speed/quality
-• Good for most uses
-• Recommended default
-
-📈 *High (300 DPI)*
-• Higher quality
-• Larger file size
-• Better for printing
+            current_quality = settings['quality']
+            quality_info, reply_markup = _build_quality_markup(current_quality)
 
-🚀 *Ultra (600 DPI)*
-• Maximum quality
-• Largest file size
-• Professional quality
-            """
-            
-            await query.edit_message_text(
+            self._edit(query, 
                 quality_info,
-                parse_mode=ParseMode.MARKDOWN,
+                parse_mode=ParseMode.HTML,
                 reply_markup=reply_markup
             )
-            
+
         elif data == "setting_format":
-            current_format = self.user_data[user_id]['settings'].get('format', 'PNG')
-            
-            keyboard = [
-                [InlineKeyboardButton(f"PNG {'✅' if current_format == 'PNG' else ''}", callback_data="format_PNG"),
-                 InlineKeyboardButton(f"JPEG {'✅' if current_format == 'JPEG' else ''}", callback_data="format_JPEG")],
-                [InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                f"🖼️ *Select Output Format*\n\nCurrent: *{current_format}*\n\n• PNG: Lossless, larger files\n• JPEG: Compressed, smaller files",
-                parse_mode=ParseMode.MARKDOWN,
+            current_format = settings['format']
+            text, reply_markup = _build_format_markup(current_format)
+
+            self._edit(query, 
+                text,
+                parse_mode=ParseMode.HTML,
                 reply_markup=reply_markup
             )
             
         elif data == "setting_auto_enhance":
-            current = self.user_data[user_id]['settings'].get('auto_enhance', False)
-            self.user_data[user_id]['settings']['auto_enhance'] = not current
-            status = "Enabled" if not current else "Disabled"
-            
-            keyboard = [[InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                f"✨ *Auto-enhance {status}!*\n\nImages will be {'automatically enhanced' if not current else 'converted without enhancement'} before PDF conversion.",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
+            new_value = not settings['auto_enhance']
+            settings['auto_enhance'] = new_value
+
+            self._edit(query, 
+                _AUTO_ENHANCE_TEXTS[new_value],
+                debounce=self._TOGGLE_DEBOUNCE,
+                parse_mode=ParseMode.HTML,
+                reply_markup=_MARKUP_BACK_SETTINGS
             )
-            
+
         elif data.startswith("quality_"):
-            quality = data.replace("quality_", "")
-            self.user_data[user_id]['settings']['quality'] = quality
-            
-            keyboard = [
-                [InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings"),
-                 InlineKeyboardButton("📄 Convert Images Now", callback_data="convert_images_pdf")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                f"📸 *Quality set to {quality.title()}!*\n\nThis setting will be used for all future conversions.",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
+            quality = suffix
+            settings['quality'] = quality
+
+            self._edit(query, 
+                _quality_set_text(quality),
+                debounce=self._TOGGLE_DEBOUNCE,
+                parse_mode=ParseMode.HTML,
+                reply_markup=_MARKUP_QUALITY_SET
             )
-            
+
         elif data.startswith("format_"):
-            format_type = data.replace("format_", "")
-            self.user_data[user_id]['settings']['format'] = format_type
-            
-            keyboard = [
-                [InlineKeyboardButton("🔙 Back to Settings", callback_data="show_settings")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                f"🖼️ *Format set to {format_type}!*\n\nThis will be used for PDF to images conversion.",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
+            format_type = suffix
+            settings['format'] = format_type
+
+            self._edit(query, 
+                _format_set_text(format_type),
+                debounce=self._TOGGLE_DEBOUNCE,
+                parse_mode=ParseMode.HTML,
+                reply_markup=_MARKUP_BACK_SETTINGS
             )
 
-    async def handle_show_callbacks(self, query, context, data):
+    async def handle_show_callbacks(self, query, context, data, suffix):
         """Handle show callbacks"""
         if data == "show_help":
             await self.show_help_inline(query)
@@ -199,195 +524,124 @@ Current: *{current_quality.title()}*
         elif data == "show_formats":
             await self.show_formats_inline(query)
 
-    async def handle_general_callbacks(self, query, context, data):
-        """Handle general callbacks"""
+    async def handle_general_callbacks(self, query, context, data, suffix=''):
+        """Handle general callbacks via the exact-match dispatch table"""
+        handler = self._general_handlers.get(data)
+        if handler is not None:
+            await handler(query, context, data)
+
+    # Thin dispatch targets for the general callback table
+    async def _on_clear_session(self, query, context, data):
+        await self.clear_session_inline(query)
+
+    async def _on_clear_images(self, query, context, data):
         user_id = query.from_user.id
-        
-        if data == "clear_session":
-            await self.clear_session_inline(query)
-        elif data == "clear_images":
-            if user_id in self.user_data:
-                self.user_data[user_id]['images'] = []
-            
-            keyboard = [[InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                "🗑️ Images cleared! Send new images to start over.",
-                reply_markup=reply_markup
-            )
-        elif data == "add_more":
-            await query.edit_message_text("📸 Send more images to add to your collection!")
-        elif data == "preview_images":
-            await self.preview_images(query, context)
-        elif data == "conversion_settings":
-            await self.show_conversion_settings(query)
-        elif data == "back_to_main":
-            await self.show_main_menu(query)
-        elif data == "back_to_images":
-            await self.show_image_menu(query)
-        elif data in ["pdf_info", "word_info", "excel_info", "text_info"]:
-            info_type = data.replace("_info", "")
-            self.user_data[user_id]['requested_info'] = info_type
-            await query.edit_message_text(f"📊 {info_type.title()} info requested!")
-        elif data == "pdf_settings":
-            await self.show_pdf_settings(query)
-        elif data == "extract_text":
-            self.user_data[user_id]['requested_action'] = 'extract_text'
-            await query.edit_message_text("🔍 Text extraction requested!")
+        if user_id in self.user_data:
+            self.user_data[user_id]['images'] = []
+            self.user_data[user_id].pop('image_sizes', None)
 
-    # Inline display methods
-    async def show_help_inline(self, query):
-        """Show help inline"""
-        help_text = """
-📚 *Quick Help*
+        self._edit(query, 
+            "🗑️ Images cleared! Send new images to start over.",
+            reply_markup=_MARKUP_BACK_MAIN
+        )
 
-📸 *Images:* Send photos → Convert to PDF
-📄 *PDFs:* Send PDF → Extract as images
-📝 *Documents:* Send DOCX/XLSX → Convert to PDF
-📝 *Custom Names:* Click "📝 Custom Name" before converting
+    async def _on_add_more(self, query, context, data):
+        self._edit(query, "📸 Send more images to add to your collection!")
 
-*Commands:*
-/start - Main menu
-/help - Detailed help
-/stats - Your statistics
-/settings - Preferences
-/clear - Clear session
-/cancel - Cancel custom naming
+    async def _on_preview_images(self, query, context, data):
+        await self.preview_images(query, context)
 
-*Tips:* Send multiple images for batch conversion!
-        """
-        
-        keyboard = [[InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            help_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+    async def _on_conversion_settings(self, query, context, data):
+        await self.show_conversion_settings(query)
+
+    async def _on_back_to_main(self, query, context, data):
+        await self.show_main_menu(query)
+
+    async def _on_back_to_images(self, query, context, data):
+        await self.show_image_menu(query)
+
+    async def _on_info_request(self, query, context, data):
+        user_id = query.from_user.id
+        info_type = data.replace("_info", "")
+        self.user_data[user_id]['requested_info'] = info_type
+        self._edit(query, f"📊 {info_type.title()} info requested!")
+
+    async def _on_pdf_settings(self, query, context, data):
+        await self.show_pdf_settings(query)
+
+    async def _on_extract_text(self, query, context, data):
+        user_id = query.from_user.id
+        self.user_data[user_id]['requested_action'] = 'extract_text'
+        self._edit(query, "🔍 Text extraction requested!")
+
+    # Inline display methods
+    async def show_help_inline(self, query):
+        """Show help inline"""
+        self._edit(query, 
+            _HELP_TEXT,
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_BACK_MAIN
         )
 
     async def show_stats_inline(self, query):
         """Show stats inline"""
         user_id = query.from_user.id
         stats = self.user_data[user_id]
-        
-        stats_text = f"""
-📊 *Your Statistics*
 
-🔄 Conversions: {stats.get('conversions', 0)}
-📁 Files Processed: {stats.get('files_processed', 0)}
-📸 Images in Queue: {len(stats.get('images', []))}
+        stats_text = _render_stats(stats.get('conversions', 0),
+                                   stats.get('files_processed', 0),
+                                   len(stats.get('images', [])))
 
-🏆 Keep converting!
-        """
-        
-        keyboard = [[InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
+        self._edit(query, 
             stats_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_BACK_MAIN
         )
 
     async def show_settings_inline(self, query):
         """Show settings inline"""
         user_id = query.from_user.id
-        settings = self.user_data[user_id]['settings']
-        
-        settings_text = f"""
-🎛️ *Current Settings*
+        settings = self.user_data[user_id].setdefault('settings', dict(_DEFAULT_SETTINGS))
 
-📸 Quality: *{settings.get('quality', 'medium').title()}*
-🖼️ Format: *{settings.get('format', 'PNG')}*
-✨ Auto-Enhance: *{'On' if settings.get('auto_enhance', False) else 'Off'}*
+        settings_text = _render_settings(settings['quality'], settings['format'],
+                                         settings['auto_enhance'])
 
-Click below to change settings:
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("📸 Quality", callback_data="setting_quality"),
-             InlineKeyboardButton("🖼️ Format", callback_data="setting_format")],
-            [InlineKeyboardButton("✨ Auto-Enhance", callback_data="setting_auto_enhance")],
-            [InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
+        self._edit(query,
             settings_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_SETTINGS
         )
 
     async def show_formats_inline(self, query):
         """Show formats inline"""
-        formats_text = """
-📋 *Supported Formats*
-
-📸 *Images:* JPG, PNG, GIF, BMP, TIFF → PDF
-📄 *Documents:* PDF ↔ Images
-📝 *Word:* DOCX, DOC → PDF
-📊 *Excel:* XLSX, XLS → PDF (Enhanced!)
-📄 *Text:* TXT, HTML, MD → PDF
-
-*Max file size:* 50MB
-*Max images per PDF:* 50
-
-✨ *New:* Custom filenames supported!
-        """
-        
-        keyboard = [[InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            formats_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+        self._edit(query, 
+            _FORMATS_TEXT,
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_BACK_MAIN
         )
 
     async def clear_session_inline(self, query):
         """Clear session inline"""
         user_id = query.from_user.id
-        if user_id in self.user_data:
-            current_data = self.user_data[user_id]
-            self.user_data[user_id]['images'] = []
+        ud = self.user_data.get(user_id)
+        if ud is not None:
+            ud['images'] = []
+            ud.pop('image_sizes', None)
             # Clear temporary document references
-            for key in ['current_pdf', 'current_word', 'current_excel', 'current_text', 'pending_conversion', 'custom_filename']:
-                if key in current_data:
-                    del current_data[key]
-        
-        keyboard = [[InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_main")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
+            for key in _CLEARABLE_KEYS:
+                ud.pop(key, None)
+
+        self._edit(query, 
             "🧹 Session cleared! Ready for new conversions!",
-            reply_markup=reply_markup
+            reply_markup=_MARKUP_BACK_MAIN
         )
 
     async def show_main_menu(self, query):
         """Show main menu"""
-        welcome_text = """
-🚀 *Advanced Document Converter*
-
-Ready to convert your files!
-
-Send me any supported file to get started.
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("📚 Help", callback_data="show_help"),
-             InlineKeyboardButton("🎛️ Settings", callback_data="show_settings")],
-            [InlineKeyboardButton("📊 Stats", callback_data="show_stats"),
-             InlineKeyboardButton("📋 Formats", callback_data="show_formats")],
-            [InlineKeyboardButton("🧹 Clear Session", callback_data="clear_session")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            welcome_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+        self._edit(query, 
+            _WELCOME_TEXT,
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_MAIN
         )
 
     async def show_image_menu(self, query):
@@ -397,116 +651,111 @@ Send me any supported file to get started.
         
         text = f"📸 Images in queue: {image_count}\n\nWhat would you like to do?"
         
-        keyboard = [
-            [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
-             InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
-            [InlineKeyboardButton("📸 Add More", callback_data="add_more"),
-             InlineKeyboardButton("🎨 Enhance", callback_data="enhance_menu")],
-            [InlineKeyboardButton("👁️ Preview", callback_data="preview_images"),
-             InlineKeyboardButton("⚙️ Settings", callback_data="conversion_settings")],
-            [InlineKeyboardButton("🗑️ Clear All", callback_data="clear_images"),
-             InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, reply_markup=reply_markup)
+        self._edit(query, text, reply_markup=_MARKUP_IMAGE_MENU)
+
+    @staticmethod
+    def _safe_getsize(path):
+        """Return file size in bytes, or None if the file is gone"""
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
 
     async def preview_images(self, query, context):
         """Preview images in queue"""
         user_id = query.from_user.id
-        images = self.user_data[user_id].get('images', [])
-        
+        ud = self.user_data[user_id]
+        images = ud.get('images', [])
+
         if not images:
-            keyboard = [[InlineKeyboardButton("🔙 Back", callback_data="back_to_main")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
+            self._edit(query,
                 "📸 No images in queue.",
-                reply_markup=reply_markup
+                reply_markup=_MARKUP_PREVIEW_EMPTY
             )
             return
         
-        preview_text = f"👁️ *Image Preview*\n\n"
-        preview_text += f"Total images: {len(images)}\n\n"
-        
-        for i, img_path in enumerate(images[:5], 1):  # Show first 5
-            filename = os.path.basename(img_path)
-            try:
-                size = os.path.getsize(img_path) / 1024  # KB
-                preview_text += f"{i}. {filename} ({size:.1f} KB)\n"
-            except:
-                preview_text += f"{i}. {filename}\n"
-        
-        if len(images) > 5:
-            preview_text += f"... and {len(images) - 5} more"
-        
-        keyboard = [
-            [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
-             InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
-            [InlineKeyboardButton("🔙 Back", callback_data="back_to_images")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
+        # Reuse the previously rendered preview while the queue is unchanged
+        # so re-opening the preview doesn't re-stat the same files.
+        queue_key = tuple(images)
+        cached = ud.get('_preview_cache')
+        if cached is not None and cached[0] == queue_key:
+            preview_text = cached[1]
+        else:
+            preview_text = f"👁️ <b>Image Preview</b>\n\n"
+            preview_text += f"Total images: {len(images)}\n\n"
+
+            # Sizes are recorded at upload time; only legacy entries without
+            # a cached size get stat'ed, in worker threads so slow storage
+            # can't block the event loop. A missing file yields None instead
+            # of failing the batch.
+            shown = images[:5]  # Show first 5
+            size_cache = ud.get('image_sizes', {})
+            sizes = [size_cache.get(p) for p in shown]
+            missing = [i for i, size in enumerate(sizes) if size is None]
+            if missing:
+                stats = await asyncio.gather(
+                    *[asyncio.to_thread(self._safe_getsize, shown[i]) for i in missing]
+                )
+                for i, size in zip(missing, stats):
+                    sizes[i] = size
+
+            for i, (img_path, size) in enumerate(zip(shown, sizes), 1):
+                filename = os.path.basename(img_path)
+                if size is not None:
+                    preview_text += f"{i}. {filename} ({size / 1024:.1f} KB)\n"
+                else:
+                    preview_text += f"{i}. {filename}\n"
+
+            if len(images) > 5:
+                preview_text += f"... and {len(images) - 5} more"
+
+            ud['_preview_cache'] = (queue_key, preview_text)
+        
+        self._edit(query,
             preview_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_PREVIEW
         )
 
     async def show_conversion_settings(self, query):
         """Show conversion settings"""
         user_id = query.from_user.id
-        settings = self.user_data[user_id]['settings']
+        settings = self.user_data[user_id].setdefault('settings', dict(_DEFAULT_SETTINGS))
         
         text = f"""
-⚙️ *Conversion Settings*
+⚙️ <b>Conversion Settings</b>
 
 Current settings for your conversions:
 
-📸 Quality: *{settings.get('quality', 'medium').title()}*
-🖼️ Format: *{settings.get('format', 'PNG')}*
-✨ Auto-Enhance: *{'On' if settings.get('auto_enhance', False) else 'Off'}*
+📸 Quality: <b>{settings['quality'].title()}</b>
+🖼️ Format: <b>{settings['format']}</b>
+✨ Auto-Enhance: <b>{'On' if settings['auto_enhance'] else 'Off'}</b>
 
 Change settings before converting:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("📸 Quality", callback_data="setting_quality"),
-             InlineKeyboardButton("🖼️ Format", callback_data="setting_format")],
-            [InlineKeyboardButton("✨ Auto-Enhance", callback_data="setting_auto_enhance")],
-            [InlineKeyboardButton("🔙 Back", callback_data="back_to_images")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
+        self._edit(query,
             text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_CONVERSION_SETTINGS
         )
 
     async def show_pdf_settings(self, query):
         """Show PDF conversion settings"""
         user_id = query.from_user.id
-        settings = self.user_data[user_id]['settings']
+        settings = self.user_data[user_id].setdefault('settings', dict(_DEFAULT_SETTINGS))
         
         text = f"""
-⚙️ *PDF Conversion Settings*
+⚙️ <b>PDF Conversion Settings</b>
 
-📸 Quality: *{settings.get('quality', 'medium').title()}*
-🖼️ Format: *{settings.get('format', 'PNG')}*
+📸 Quality: <b>{settings['quality'].title()}</b>
+🖼️ Format: <b>{settings['format']}</b>
 
 These settings will be used for PDF to images conversion.
         """
         
-        keyboard = [
-            [InlineKeyboardButton("📸 Change Quality", callback_data="setting_quality"),
-             InlineKeyboardButton("🖼️ Change Format", callback_data="setting_format")],
-            [InlineKeyboardButton("🔙 Back", callback_data="convert_pdf_images")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
+        self._edit(query,
             text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            parse_mode=ParseMode.HTML,
+            reply_markup=_MARKUP_PDF_SETTINGS
         )
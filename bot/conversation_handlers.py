@@ -2,6 +2,7 @@
 Conversation handlers for custom naming functionality
 """
 
+import re
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
@@ -12,6 +13,11 @@ from utils.security import SecurityManager
 # Conversation states
 WAITING_FOR_NAME = 1
 
+# Names made only of the characters advertised in the error message need no
+# sanitizer pass at all; anything else falls back to the full sanitizer.
+# A literal space, not \s: tabs/newlines must take the sanitizer path.
+_SAFE_NAME_RE = re.compile(r"^[\w .\-]{1,64}$")
+
 
 class ConversationHandlers:
     """Handles conversation flows like custom naming"""
@@ -47,9 +53,14 @@ class ConversationHandlers:
         user_id = update.effective_user.id
         custom_name = update.message.text.strip()
         
-        # Sanitize the filename
-        safe_name = self.security.sanitize_filename(custom_name + ".tmp").replace(".tmp", "")
-        
+        # Well-formed names pass the regex and are used as-is; the sanitizer
+        # (with its append-suffix/strip-suffix dance to keep the bare name)
+        # only runs on input that actually needs cleaning.
+        if _SAFE_NAME_RE.match(custom_name):
+            safe_name = custom_name
+        else:
+            safe_name = self.security.sanitize_filename(custom_name + ".tmp").replace(".tmp", "")
+
         if not safe_name or safe_name == "unnamed_file":
             await update.message.reply_text(
                 "❌ Invalid filename! Please try again with a valid name.\n"
@@ -2,9 +2,14 @@
 File handlers for the Telegram Document Converter Bot
 """
 
+import io
 import os
-import uuid
+import time
+import shutil
+import asyncio
 import logging
+import contextlib
+from collections import deque
 from datetime import datetime
 from PIL import Image
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -14,8 +19,131 @@ from telegram.constants import ChatAction
 from config.config import BotConfig
 from utils.security import SecurityManager
 
+# Static reply keyboards for the upload flows, built once at import time
+# instead of re-allocating the button trees on every received file.
+_MARKUP_PHOTO_OPTIONS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
+    [InlineKeyboardButton("📸 Add More Images", callback_data="add_more"),
+     InlineKeyboardButton("🎨 Enhance Images", callback_data="enhance_menu")],
+    [InlineKeyboardButton("👁️ Preview Images", callback_data="preview_images"),
+     InlineKeyboardButton("⚙️ Settings", callback_data="conversion_settings")],
+    [InlineKeyboardButton("🗑️ Clear All", callback_data="clear_images"),
+     InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+])
+
+_MARKUP_PDF_OPTIONS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🖼️ Convert to Images", callback_data="convert_pdf_images"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_pdf_images")],
+    [InlineKeyboardButton("📊 PDF Info", callback_data="pdf_info"),
+     InlineKeyboardButton("🔍 Extract Text", callback_data="extract_text")],
+    [InlineKeyboardButton("⚙️ Settings", callback_data="pdf_settings"),
+     InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+])
+
+_MARKUP_WORD_OPTIONS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_word_pdf"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_word_pdf")],
+    [InlineKeyboardButton("📊 Document Info", callback_data="word_info"),
+     InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+])
+
+_MARKUP_EXCEL_OPTIONS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_excel_pdf"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_excel_pdf")],
+    [InlineKeyboardButton("📊 Excel Info", callback_data="excel_info"),
+     InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+])
+
+_MARKUP_TEXT_OPTIONS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_text_pdf"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_text_pdf")],
+    [InlineKeyboardButton("📊 Text Info", callback_data="text_info"),
+     InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+])
+
+_MARKUP_DOC_IMAGE_OPTIONS = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
+     InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
+    [InlineKeyboardButton("🎨 Enhance Image", callback_data="enhance_menu"),
+     InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
+])
+
+_MARKUP_MAIN_MENU_ONLY = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]]
+)
+
+
+def _pdf_file_info(doc) -> str:
+    """Reply text for a received PDF, without markdown to avoid entity errors"""
+    filename = doc.file_name or "Unknown"
+    return (f"📄 PDF Received\n\n"
+            f"📁 Name: {filename}\n"
+            f"📏 Size: {(doc.file_size or 0) / 1048576:.2f} MB")
+
+
+# Per-kind behavior for the shared document handler:
+# (state key, reply text or builder, markup, send typing action, error text)
+_DOC_KINDS = {
+    'pdf': ('current_pdf', _pdf_file_info, _MARKUP_PDF_OPTIONS, True,
+            "❌ Error processing PDF. Please try again."),
+    'word': ('current_word', "📝 Word document received! Ready to convert?",
+             _MARKUP_WORD_OPTIONS, True,
+             "❌ Error processing Word document. Please try again."),
+    'excel': ('current_excel', "📊 Excel file received! Ready to convert with enhanced formatting?",
+              _MARKUP_EXCEL_OPTIONS, True,
+              "❌ Error processing Excel file. Please try again."),
+    'text': ('current_text', "📝 Text document received! Ready to convert?",
+             _MARKUP_TEXT_OPTIONS, False,
+             "❌ Error processing text document. Please try again."),
+}
+
+
+# Timestamp strings only need second resolution for join_date/last_used, so
+# re-render the isoformat string at most once per second instead of paying
+# strftime + allocation on every update.
+_now_cache = (0, '')
+
+
+def _now_iso() -> str:
+    """Current isoformat timestamp with one-second granularity"""
+    global _now_cache
+    bucket = int(time.time())
+    if _now_cache[0] != bucket:
+        _now_cache = (bucket, datetime.now().isoformat())
+    return _now_cache[1]
+
+
+# JPEG start-of-image marker; Telegram photos are always JPEG
+_JPEG_MAGIC = b'\xff\xd8\xff'
+
+# Signatures of the image formats accepted as documents. Sniffing these is
+# enough to reject junk without a PIL decode; anything passing here still
+# has to survive the conversion pipeline later.
+_IMAGE_MAGICS = (
+    _JPEG_MAGIC,                 # JPEG
+    b'\x89PNG\r\n\x1a\n',        # PNG
+    b'GIF8',                     # GIF87a/GIF89a
+    b'BM',                       # BMP
+    b'II*\x00',                  # TIFF little-endian
+    b'MM\x00*',                  # TIFF big-endian
+)
+
+
+def _is_image_payload(head: bytes) -> bool:
+    """True if the first payload bytes carry an accepted image signature"""
+    if head.startswith(_IMAGE_MAGICS):
+        return True
+    # WEBP needs two probes: 'RIFF' alone would also match WAV/AVI
+    return head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+
+
 class FileHandlers:
     """Handles file processing for the bot"""
+
+    __slots__ = ('config', 'user_data', 'security', 'temp_base_dir', 'logger',
+                 'user_message_ids', '_too_large_msg', '_rand_buf', '_rand_pos',
+                 '_user_dirs_created', '_last_action')
     
     def __init__(self, config: BotConfig, user_data: dict, security: SecurityManager, temp_base_dir: str):
         self.config = config
@@ -23,8 +151,22 @@ class FileHandlers:
         self.security = security
         self.temp_base_dir = temp_base_dir
         self.logger = logging.getLogger(__name__)
+        # Rejection text is identical for every oversized file; format it once
+        self._too_large_msg = (
+            f"❌ File too large! Maximum size is {config.max_file_size // (1024*1024)}MB."
+        )
         # Add message tracking for clean interface
         self.user_message_ids = {}  # Track messages to delete for clean interface
+        # Batched urandom pool for filename suffixes (one syscall per 1024 tokens)
+        self._rand_buf = b''
+        self._rand_pos = 0
+        # Users whose temp directory is known to exist; skips the makedirs
+        # stat/mkdir syscalls on every upload after the first. Temp dirs only
+        # go away when the whole tree is removed at shutdown.
+        self._user_dirs_created = set()
+        # Last typing-action time per chat; Telegram shows the indicator for
+        # ~5s, so re-sending within a few seconds is a wasted round-trip
+        self._last_action = {}
     
     def _initialize_user_data(self, user_id: int):
         """Initialize user data if not exists"""
@@ -33,8 +175,8 @@ class FileHandlers:
                 'images': [],
                 'conversions': 0,
                 'files_processed': 0,
-                'join_date': datetime.now().isoformat(),
-                'last_used': datetime.now().isoformat(),
+                'join_date': _now_iso(),
+                'last_used': _now_iso(),
                 'settings': {
                     'quality': self.config.default_image_quality,
                     'format': self.config.default_output_format,
@@ -44,30 +186,159 @@ class FileHandlers:
                 'custom_filename': None
             }
 
+    def _send_typing(self, context, chat_id: int):
+        """Fire a typing action, at most once per 3s per chat.
+
+        Fire-and-forget: the indicator is cosmetic, so the handler doesn't
+        wait out the API round-trip before starting real work.
+        """
+        now = time.monotonic()
+        if now - self._last_action.get(chat_id, 0) > 3:
+            self._last_action[chat_id] = now
+            task = asyncio.create_task(
+                context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+            )
+            task.add_done_callback(self._log_task_exception)
+
+    def _log_task_exception(self, task):
+        """Surface failures from fire-and-forget tasks"""
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.debug("Background chat action failed: %s", task.exception())
+
+    def _short_token(self) -> str:
+        """8-hex-char filename suffix drawn from a batched urandom buffer.
+
+        uuid4 costs one urandom syscall per call; slicing a 4KB buffer
+        amortizes that 1024:1. Single-threaded under the event loop, so no
+        locking is needed.
+        """
+        if self._rand_pos >= len(self._rand_buf):
+            self._rand_buf = os.urandom(4096)
+            self._rand_pos = 0
+        token = self._rand_buf[self._rand_pos:self._rand_pos + 4].hex()
+        self._rand_pos += 4
+        return token
+
+    def _user_temp_dir(self, user_id: int) -> str:
+        """Per-user temp directory, created on first use"""
+        user_temp_dir = os.path.join(self.temp_base_dir, str(user_id))
+        if user_id not in self._user_dirs_created:
+            os.makedirs(user_temp_dir, exist_ok=True)
+            self._user_dirs_created.add(user_id)
+        return user_temp_dir
+
+    async def _gc_loop(self):
+        """Periodically sweep stale per-user temp directories.
+
+        Uploads accumulate on disk between conversions; anything untouched
+        for temp_cleanup_hours is recoverable from Telegram, so it gets
+        removed. Deletion runs in worker threads so a large sweep can't
+        stall the event loop.
+        """
+        interval = self.config.temp_cleanup_hours * 3600
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                cutoff = time.time() - interval
+                with os.scandir(self.temp_base_dir) as entries:
+                    stale = [e.path for e in entries
+                             if e.is_dir() and e.stat().st_mtime < cutoff]
+                if stale:
+                    await asyncio.gather(
+                        *(asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+                          for path in stale)
+                    )
+                    # Forget the swept users so their directory is recreated
+                    # on the next upload
+                    swept_users = {
+                        int(os.path.basename(path)) for path in stale
+                        if os.path.basename(path).isdigit()
+                    }
+                    self._user_dirs_created -= swept_users
+                    # Their in-memory sessions may still point at the files
+                    # just removed; drop those references too, or the next
+                    # Convert press fails on paths that no longer exist.
+                    for uid in swept_users:
+                        if uid in self.user_data:
+                            state = self.user_data[uid]
+                            state['images'] = []
+                            state.pop('image_sizes', None)
+                    self.logger.info("Temp cleanup removed %d stale user directories", len(stale))
+            except Exception as e:
+                self.logger.warning(f"Temp cleanup sweep failed: {e}")
+
     def _track_message(self, user_id: int, message_id: int):
         """Track message ID for later cleanup"""
-        if user_id not in self.user_message_ids:
-            self.user_message_ids[user_id] = []
-        
-        self.user_message_ids[user_id].append(message_id)
-        
-        # Keep only last 10 messages to avoid memory issues
-        if len(self.user_message_ids[user_id]) > 10:
-            self.user_message_ids[user_id] = self.user_message_ids[user_id][-10:]
+        # maxlen keeps only the last 10 messages to avoid memory issues,
+        # evicting in O(1) instead of re-slicing the list per message
+        self.user_message_ids.setdefault(user_id, deque(maxlen=10)).append(message_id)
 
     async def _cleanup_previous_messages(self, chat_id: int, user_id: int, context: ContextTypes.DEFAULT_TYPE):
         """Delete previous bot messages for clean interface"""
-        if user_id in self.user_message_ids:
-            messages_to_delete = self.user_message_ids[user_id].copy()
-            self.user_message_ids[user_id] = []  # Clear the list
-            
-            for msg_id in messages_to_delete:
-                try:
-                    await context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-                except Exception as e:
+        messages_to_delete = self.user_message_ids.pop(user_id, None)
+        if messages_to_delete:
+            # Fire the deletes concurrently: ten sequential round-trips
+            # otherwise delay the reply to the freshly uploaded file
+            results = await asyncio.gather(
+                *[context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
+                  for msg_id in messages_to_delete],
+                return_exceptions=True
+            )
+            for msg_id, result in zip(messages_to_delete, results):
+                if isinstance(result, Exception):
                     # Message might already be deleted or too old
-                    self.logger.debug(f"Could not delete message {msg_id}: {e}")
-                    continue
+                    self.logger.debug(f"Could not delete message {msg_id}: {result}")
+
+    @staticmethod
+    def _validate_image(path: str):
+        """Header-only PIL validation, run in a worker thread"""
+        with Image.open(path) as im:
+            im.verify()
+
+    @staticmethod
+    def _write_bytes(path: str, data):
+        """Synchronous disk write, run in a worker thread"""
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    # Abort downloads that a slow or stalled peer connection would
+    # otherwise park indefinitely
+    _DOWNLOAD_TIMEOUT = 60
+
+    async def _download_file(self, file, path: str, magic: bytes = None):
+        """Download a Telegram file without blocking the event loop.
+
+        download_to_drive performs its final disk write synchronously on
+        the event loop, stalling every other handler while the bytes hit
+        disk. Fetch the payload into memory over the async client instead
+        and push the write into a worker thread. The fetch is bounded by a
+        timeout, and a payload larger than the configured maximum (the
+        advertised file_size is client-supplied and can lie) is rejected
+        before it is written anywhere.
+
+        If ``magic`` is given, the payload's signature is checked while it
+        is still in memory — a bad file aborts before anything is written
+        to disk, instead of after a full write/open/remove round trip.
+        ``magic`` may be a signature, a tuple of signatures, or a predicate
+        over the first 16 payload bytes (for formats like WEBP whose check
+        is not a plain prefix).
+        """
+        buf = io.BytesIO()
+        await asyncio.wait_for(file.download_to_memory(out=buf),
+                               timeout=self._DOWNLOAD_TIMEOUT)
+        data = buf.getbuffer()
+        if data.nbytes > self.config.max_file_size:
+            raise ValueError("payload exceeds configured size limit")
+        if magic is not None:
+            head = data[:16].tobytes()
+            if callable(magic):
+                valid = magic(head)
+            else:
+                magics = magic if isinstance(magic, tuple) else (magic,)
+                valid = head.startswith(magics)
+            if not valid:
+                raise ValueError("unexpected file signature")
+        await asyncio.to_thread(self._write_bytes, path, data)
 
     async def _send_tracked_message(self, update: Update, text: str, reply_markup=None):
         """Send a message and track it for cleanup"""
@@ -78,88 +349,85 @@ class FileHandlers:
 
     async def handle_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Photo handling with clean interface - deletes previous messages"""
-        await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-        
         user_id = update.effective_user.id
         chat_id = update.effective_chat.id
+        self._send_typing(context, chat_id)
         self._initialize_user_data(user_id)
         
         # Clean interface: Delete previous bot messages for this user
         await self._cleanup_previous_messages(chat_id, user_id, context)
         
+        udata = self.user_data[user_id]
+        images = udata['images']
+        max_images = self.config.max_images_per_pdf
+        
         try:
             # Download photo
             photo = update.message.photo[-1]  # Get highest resolution
-            file = await context.bot.get_file(photo.file_id)
             
-            # Check file size
-            if file.file_size and file.file_size > self.config.max_file_size:
+            # Check file size before the get_file round-trip; the update
+            # already carries it on the PhotoSize object
+            if photo.file_size and photo.file_size > self.config.max_file_size:
                 error_msg = await update.message.reply_text(
-                    f"❌ File too large! Maximum size is {self.config.max_file_size // (1024*1024)}MB."
+                    self._too_large_msg
                 )
                 self._track_message(user_id, error_msg.message_id)
                 return
             
+            file = await context.bot.get_file(photo.file_id)
+            
             # Create user temp directory
-            user_temp_dir = os.path.join(self.temp_base_dir, str(user_id))
-            os.makedirs(user_temp_dir, exist_ok=True)
+            user_temp_dir = self._user_temp_dir(user_id)
             
             # Generate safe filename
             file_ext = '.jpg'
-            safe_filename = f"img_{len(self.user_data[user_id]['images'])}_{uuid.uuid4().hex[:8]}{file_ext}"
+            safe_filename = f"img_{len(images)}_{self._short_token()}{file_ext}"
             image_path = os.path.join(user_temp_dir, safe_filename)
             
-            # Download file properly
-            await file.download_to_drive(image_path)
-            
-            # Verify file was downloaded
-            if not os.path.exists(image_path):
-                error_msg = await update.message.reply_text("❌ Error downloading image. Please try again.")
+            # Download file properly, rejecting non-JPEG payloads before
+            # they ever reach disk when validation is on
+            try:
+                await self._download_file(
+                    file, image_path,
+                    magic=_JPEG_MAGIC if self.config.enable_file_validation else None
+                )
+            except ValueError:
+                error_msg = await update.message.reply_text("❌ Invalid image file!")
                 self._track_message(user_id, error_msg.message_id)
                 return
             
             # Validate file only if enabled and be more permissive
             if self.config.enable_file_validation:
                 try:
-                    # Try to open with PIL to validate it's an image
-                    test_img = Image.open(image_path)
-                    test_img.close()
+                    # Header-only verify in a worker thread so the decode
+                    # doesn't block other users' updates
+                    await asyncio.to_thread(self._validate_image, image_path)
                 except Exception as e:
                     error_msg = await update.message.reply_text("❌ Invalid image file!")
                     self._track_message(user_id, error_msg.message_id)
-                    if os.path.exists(image_path):
+                    with contextlib.suppress(FileNotFoundError):
                         os.remove(image_path)
                     return
             
-            # Add to user's collection
-            self.user_data[user_id]['images'].append(image_path)
-            self.user_data[user_id]['files_processed'] += 1
-            self.user_data[user_id]['last_used'] = datetime.now().isoformat()
+            # Add to user's collection; remember the size reported by
+            # Telegram so previews don't have to stat the file again.
+            images.append(image_path)
+            udata.setdefault('image_sizes', {})[image_path] = \
+                file.file_size or os.path.getsize(image_path)
+            udata['files_processed'] += 1
+            udata['last_used'] = _now_iso()
             
             # Check if we've reached the limit
-            if len(self.user_data[user_id]['images']) >= self.config.max_images_per_pdf:
+            if len(images) >= max_images:
                 warning_msg = await update.message.reply_text(
-                    f"⚠️ Maximum {self.config.max_images_per_pdf} images reached! Please convert current batch first."
+                    f"⚠️ Maximum {max_images} images reached! Please convert current batch first."
                 )
                 self._track_message(user_id, warning_msg.message_id)
             
             # Show options WITHOUT immediate conversion buttons
-            keyboard = [
-                [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
-                 InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
-                [InlineKeyboardButton("📸 Add More Images", callback_data="add_more"),
-                 InlineKeyboardButton("🎨 Enhance Images", callback_data="enhance_menu")],
-                [InlineKeyboardButton("👁️ Preview Images", callback_data="preview_images"),
-                 InlineKeyboardButton("⚙️ Settings", callback_data="conversion_settings")],
-                [InlineKeyboardButton("🗑️ Clear All", callback_data="clear_images"),
-                 InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            image_count = len(self.user_data[user_id]['images'])
             status_msg = await update.message.reply_text(
-                f"📸 Image received! ({image_count}/{self.config.max_images_per_pdf} total)\n\nWhat would you like to do?",
-                reply_markup=reply_markup
+                f"📸 Image received! ({len(images)}/{max_images} total)\n\nWhat would you like to do?",
+                reply_markup=_MARKUP_PHOTO_OPTIONS
             )
             
             # Track this message for future cleanup
@@ -170,189 +438,58 @@ class FileHandlers:
             error_msg = await update.message.reply_text("❌ Error processing image. Please try again.")
             self._track_message(user_id, error_msg.message_id)
 
-    async def handle_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """PDF handling with clean interface"""
-        await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-        
+    async def _handle_doc(self, update: Update, context: ContextTypes.DEFAULT_TYPE, kind: str):
+        """Shared handling for PDF/Word/Excel/text uploads.
+
+        The four flows only differ in which state key holds the document
+        and what the reply says, so they share one body driven by the
+        _DOC_KINDS table instead of four near-identical methods.
+        """
+        state_key, reply, markup, typing, error_text = _DOC_KINDS[kind]
         user_id = update.effective_user.id
         chat_id = update.effective_chat.id
+        if typing:
+            self._send_typing(context, chat_id)
         self._initialize_user_data(user_id)
-        
+
         # Clean interface: Delete previous bot messages
         await self._cleanup_previous_messages(chat_id, user_id, context)
-        
+
         try:
             doc = update.message.document
-            
+
             # Check file size
             if doc.file_size and doc.file_size > self.config.max_file_size:
-                await self._send_tracked_message(
-                    update,
-                    f"❌ File too large! Maximum size is {self.config.max_file_size // (1024*1024)}MB."
-                )
+                await self._send_tracked_message(update, self._too_large_msg)
                 return
-            
-            # Get PDF info without markdown formatting to avoid entity errors
-            filename = doc.file_name or "Unknown"
-            file_info = f"📄 PDF Received\n\n"
-            file_info += f"📁 Name: {filename}\n"
-            file_info += f"📏 Size: {(doc.file_size or 0) / (1024*1024):.2f} MB"
-            
-            # Better button layout with custom naming
-            keyboard = [
-                [InlineKeyboardButton("🖼️ Convert to Images", callback_data="convert_pdf_images"),
-                 InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_pdf_images")],
-                [InlineKeyboardButton("📊 PDF Info", callback_data="pdf_info"),
-                 InlineKeyboardButton("🔍 Extract Text", callback_data="extract_text")],
-                [InlineKeyboardButton("⚙️ Settings", callback_data="pdf_settings"),
-                 InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            # Store PDF info
-            self.user_data[user_id]['current_pdf'] = doc
-            self.user_data[user_id]['files_processed'] += 1
-            self.user_data[user_id]['last_used'] = datetime.now().isoformat()
-            
-            # Send tracked message
-            await self._send_tracked_message(update, file_info, reply_markup)
-            
+
+            udata = self.user_data[user_id]
+            udata[state_key] = doc
+            udata['files_processed'] += 1
+            udata['last_used'] = _now_iso()
+
+            text = reply(doc) if callable(reply) else reply
+            await self._send_tracked_message(update, text, markup)
+
         except Exception as e:
-            self.logger.error(f"Error handling PDF: {e}")
-            await self._send_tracked_message(update, "❌ Error processing PDF. Please try again.")
+            self.logger.error(f"Error handling {kind} document: {e}")
+            await self._send_tracked_message(update, error_text)
+
+    async def handle_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """PDF handling with clean interface"""
+        await self._handle_doc(update, context, 'pdf')
 
     async def handle_word(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Word document handling with clean interface"""
-        await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-        
-        user_id = update.effective_user.id
-        chat_id = update.effective_chat.id
-        self._initialize_user_data(user_id)
-        
-        # Clean interface: Delete previous bot messages
-        await self._cleanup_previous_messages(chat_id, user_id, context)
-        
-        try:
-            doc = update.message.document
-            
-            # Check file size
-            if doc.file_size and doc.file_size > self.config.max_file_size:
-                await self._send_tracked_message(
-                    update,
-                    f"❌ File too large! Maximum size is {self.config.max_file_size // (1024*1024)}MB."
-                )
-                return
-            
-            # Better button layout
-            keyboard = [
-                [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_word_pdf"),
-                 InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_word_pdf")],
-                [InlineKeyboardButton("📊 Document Info", callback_data="word_info"),
-                 InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            self.user_data[user_id]['current_word'] = doc
-            self.user_data[user_id]['files_processed'] += 1
-            self.user_data[user_id]['last_used'] = datetime.now().isoformat()
-            
-            await self._send_tracked_message(
-                update,
-                "📝 Word document received! Ready to convert?",
-                reply_markup
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Error handling Word document: {e}")
-            await self._send_tracked_message(update, "❌ Error processing Word document. Please try again.")
+        await self._handle_doc(update, context, 'word')
 
     async def handle_excel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Excel file handling with clean interface"""
-        await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-        
-        user_id = update.effective_user.id
-        chat_id = update.effective_chat.id
-        self._initialize_user_data(user_id)
-        
-        # Clean interface: Delete previous bot messages
-        await self._cleanup_previous_messages(chat_id, user_id, context)
-        
-        try:
-            doc = update.message.document
-            
-            # Check file size
-            if doc.file_size and doc.file_size > self.config.max_file_size:
-                await self._send_tracked_message(
-                    update,
-                    f"❌ File too large! Maximum size is {self.config.max_file_size // (1024*1024)}MB."
-                )
-                return
-            
-            # Better button layout
-            keyboard = [
-                [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_excel_pdf"),
-                 InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_excel_pdf")],
-                [InlineKeyboardButton("📊 Excel Info", callback_data="excel_info"),
-                 InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            self.user_data[user_id]['current_excel'] = doc
-            self.user_data[user_id]['files_processed'] += 1
-            self.user_data[user_id]['last_used'] = datetime.now().isoformat()
-            
-            await self._send_tracked_message(
-                update,
-                "📊 Excel file received! Ready to convert with enhanced formatting?",
-                reply_markup
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Error handling Excel file: {e}")
-            await self._send_tracked_message(update, "❌ Error processing Excel file. Please try again.")
+        await self._handle_doc(update, context, 'excel')
 
     async def handle_text_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Text document handling with clean interface"""
-        user_id = update.effective_user.id
-        chat_id = update.effective_chat.id
-        self._initialize_user_data(user_id)
-        
-        # Clean interface: Delete previous bot messages
-        await self._cleanup_previous_messages(chat_id, user_id, context)
-        
-        try:
-            doc = update.message.document
-            
-            # Check file size
-            if doc.file_size and doc.file_size > self.config.max_file_size:
-                await self._send_tracked_message(
-                    update,
-                    f"❌ File too large! Maximum size is {self.config.max_file_size // (1024*1024)}MB."
-                )
-                return
-            
-            # Better button layout
-            keyboard = [
-                [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_text_pdf"),
-                 InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_text_pdf")],
-                [InlineKeyboardButton("📊 Text Info", callback_data="text_info"),
-                 InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            self.user_data[user_id]['current_text'] = doc
-            self.user_data[user_id]['files_processed'] += 1
-            self.user_data[user_id]['last_used'] = datetime.now().isoformat()
-            
-            await self._send_tracked_message(
-                update,
-                "📝 Text document received! Ready to convert?",
-                reply_markup
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Error handling text document: {e}")
-            await self._send_tracked_message(update, "❌ Error processing text document. Please try again.")
+        await self._handle_doc(update, context, 'text')
 
     async def handle_document_image(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle image documents (non-photo) with clean interface"""
@@ -370,48 +507,45 @@ class FileHandlers:
             if doc.file_size and doc.file_size > self.config.max_file_size:
                 await self._send_tracked_message(
                     update,
-                    f"❌ File too large! Maximum size is {self.config.max_file_size // (1024*1024)}MB."
+                    self._too_large_msg
                 )
                 return
             
             # Download image document
             file = await context.bot.get_file(doc.file_id)
-            user_temp_dir = os.path.join(self.temp_base_dir, str(user_id))
-            os.makedirs(user_temp_dir, exist_ok=True)
+            user_temp_dir = self._user_temp_dir(user_id)
             
             # Sanitize filename properly
             original_filename = doc.file_name or "image"
             safe_filename = self.security.sanitize_filename(original_filename)
             # Ensure unique filename
             if not safe_filename or safe_filename == "unnamed_file":
-                safe_filename = f"image_{uuid.uuid4().hex[:8]}.jpg"
+                safe_filename = f"image_{self._short_token()}.jpg"
             
             image_path = os.path.join(user_temp_dir, safe_filename)
             
-            # Download file
-            await file.download_to_drive(image_path)
-            
-            # Verify file was downloaded
-            if not os.path.exists(image_path):
-                await self._send_tracked_message(update, "❌ Error downloading image. Please try again.")
+            # Download file, sniffing the signature in memory when
+            # validation is enabled
+            try:
+                await self._download_file(
+                    file, image_path,
+                    magic=_is_image_payload if self.config.enable_file_validation else None
+                )
+            except ValueError:
+                await self._send_tracked_message(update, "❌ Invalid image file!")
                 return
             
-            self.user_data[user_id]['images'].append(image_path)
-            self.user_data[user_id]['files_processed'] += 1
-            self.user_data[user_id]['last_used'] = datetime.now().isoformat()
-            
-            keyboard = [
-                [InlineKeyboardButton("📄 Convert to PDF", callback_data="convert_images_pdf"),
-                 InlineKeyboardButton("📝 Custom Name", callback_data="custom_name_images_pdf")],
-                [InlineKeyboardButton("🎨 Enhance Image", callback_data="enhance_menu"),
-                 InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            udata = self.user_data[user_id]
+            udata['images'].append(image_path)
+            udata.setdefault('image_sizes', {})[image_path] = \
+                file.file_size or os.path.getsize(image_path)
+            udata['files_processed'] += 1
+            udata['last_used'] = _now_iso()
             
             await self._send_tracked_message(
                 update,
                 f"🖼️ Image document received!\nFormat: {doc.mime_type}",
-                reply_markup
+                _MARKUP_DOC_IMAGE_OPTIONS
             )
         except Exception as e:
             self.logger.error(f"Error handling document image: {e}")
@@ -428,13 +562,10 @@ class FileHandlers:
         doc = update.message.document
         file_info = f"📄 Document received: {doc.file_name}\n"
         file_info += f"Type: {doc.mime_type or 'Unknown'}\n"
-        file_info += f"Size: {(doc.file_size or 0) / (1024*1024):.2f} MB\n\n"
+        file_info += f"Size: {(doc.file_size or 0) / 1048576:.2f} MB\n\n"
         file_info += "This file type is not directly supported for conversion, but you can try:\n"
         file_info += "• Save as PDF if possible\n"
         file_info += "• Convert to supported format first\n"
         file_info += "• Use /formats to see supported types"
         
-        keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data="back_to_main")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await self._send_tracked_message(update, file_info, reply_markup)
+        await self._send_tracked_message(update, file_info, _MARKUP_MAIN_MENU_ONLY)
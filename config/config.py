@@ -16,6 +16,10 @@ except ImportError:
     print("⚠️  python-dotenv not available. Using environment variables only.")
 
 
+# Accepted truthy spellings for boolean environment variables
+_TRUE_SET = frozenset(('true', '1', 'yes', 'on', 'enabled'))
+
+
 class BotConfig:
     """Configuration class with all settings"""
     
@@ -46,6 +50,11 @@ class BotConfig:
         self.max_images_per_pdf = self._get_env_int('MAX_IMAGES_PER_PDF', 50)
         self.max_concurrent_conversions = self._get_env_int('MAX_CONCURRENT_CONVERSIONS', 5)
         self.temp_cleanup_hours = self._get_env_int('TEMP_CLEANUP_HOURS', 24)
+        self.temp_dir = os.getenv('TEMP_DIR')  # Override temp storage location (optional)
+
+        # User state storage
+        self.user_cache_size = self._get_env_int('USER_CACHE_SIZE', 10000)
+        self.user_data_dir = os.getenv('USER_DATA_DIR')  # Cold store for evicted users (optional)
         
         # Image settings
         self.default_image_quality = os.getenv('DEFAULT_IMAGE_QUALITY', 'medium')
@@ -108,7 +117,7 @@ class BotConfig:
         value = os.getenv(key)
         if value is None:
             return default
-        return value.lower() in ('true', '1', 'yes', 'on', 'enabled')
+        return value.lower() in _TRUE_SET
     
     def _validate_config(self):
         """Validate configuration"""
@@ -5,17 +5,20 @@ Document conversion functionality for the Telegram Document Converter Bot
 import os
 import io
 import logging
+import functools
 import asyncio
 import uuid
 import shutil
+import zipfile
+import tempfile
 import subprocess
 from datetime import datetime
-from typing import List
+from typing import BinaryIO, List, Union
 from concurrent.futures import ThreadPoolExecutor
 
 from PIL import Image, ImageEnhance, ImageFilter
 import fitz  # PyMuPDF
-from docx import Document as DocxDocument
+from lxml import etree
 import openpyxl
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
@@ -27,6 +30,91 @@ from reportlab.lib import colors
 from config.config import BotConfig
 
 
+# WordprocessingML element names for the raw document.xml parse
+_DOCX_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_W_BODY = f'{{{_DOCX_W_NS}}}body'
+_W_P = f'{{{_DOCX_W_NS}}}p'
+_W_R = f'{{{_DOCX_W_NS}}}r'
+_W_T = f'{{{_DOCX_W_NS}}}t'
+_W_TAB = f'{{{_DOCX_W_NS}}}tab'
+_W_BR = f'{{{_DOCX_W_NS}}}br'
+_W_CR = f'{{{_DOCX_W_NS}}}cr'
+
+
+def _paragraph_text(para) -> str:
+    """Paragraph text with tabs and breaks rendered like python-docx did.
+
+    Walks runs and their direct children so run-level <w:tab/>, <w:br/>
+    and <w:cr/> come out as '\\t'/'\\n' alongside the <w:t> text, while
+    the <w:tab> tab-stop definitions under <w:pPr><w:tabs> stay ignored.
+    """
+    parts = []
+    for run in para.iter(_W_R):
+        for node in run.iterchildren(_W_T, _W_TAB, _W_BR, _W_CR):
+            if node.tag == _W_T:
+                parts.append(node.text or '')
+            elif node.tag == _W_TAB:
+                parts.append('\t')
+            else:
+                parts.append('\n')
+    return ''.join(parts)
+
+
+@functools.lru_cache(maxsize=16)
+def _brightness_lut(strength: float) -> bytes:
+    """256-entry lookup table for a linear brightness scale"""
+    return bytes(min(255, max(0, round(i * strength))) for i in range(256))
+
+
+# Brightness (x1.1) and contrast (x1.2) are both linear per-pixel
+# transforms, so the auto-enhance pair composes into a single table
+# applied in one point() pass. Pillow's Contrast pivots on the image
+# mean rather than mid-gray 128; for photographic input the difference
+# is visually negligible and the fold saves two full-image passes.
+_AUTO_ENHANCE_LUT = bytes(
+    min(255, max(0, round((i * 1.1 - 128) * 1.2 + 128))) for i in range(256)
+)
+
+# TableStyle is stateless after construction, so one instance serves
+# every rendered worksheet
+_EXCEL_TABLE_STYLE = TableStyle([
+    # Basic table structure
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),  # Header row
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+
+    # Grid lines
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.black),
+
+    # Alternating row colors
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+
+    # Cell padding
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 3),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+])
+
+
+def _format_cell(value) -> str:
+    """Render a raw worksheet value as truncated display text"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    cell_text = str(value)
+    # Limit cell content length for PDF
+    if len(cell_text) > 30:
+        cell_text = cell_text[:27] + "..."
+    return cell_text
+
+
 class DocumentConverter:
     """Enhanced document conversion functionality with proper Excel formatting and custom naming"""
     
@@ -34,46 +122,153 @@ class DocumentConverter:
         self.config = config
         self.executor = ThreadPoolExecutor(max_workers=config.max_concurrent_conversions)
         self.logger = logging.getLogger(__name__)
+        # getSampleStyleSheet builds ~15 ParagraphStyle objects per call;
+        # the sheet is read-only for our purposes, so build it once here
+        self._styles = getSampleStyleSheet()
+        # Probe the external converters once instead of paying a failed
+        # fork+execve per conversion on systems where they aren't installed
+        self._lo_cmd = shutil.which('libreoffice') or shutil.which('soffice')
+        self._pandoc_cmd = shutil.which('pandoc')
     
-    async def images_to_pdf(self, image_paths: List[str], output_path: str, 
+    async def images_to_pdf(self, image_paths: List[str], output_path: Union[str, BinaryIO],
                            quality: str = 'medium', add_metadata: bool = True) -> bool:
-        """Convert multiple images to a single PDF with fixed scaling"""
+        """Convert multiple images to a single PDF with fixed scaling
+
+        output_path may be a filesystem path or a writable binary stream;
+        passing a BytesIO avoids the write-then-reopen round trip when the
+        PDF is sent straight back to Telegram.
+        """
         try:
             loop = asyncio.get_event_loop()
+
+            # Method 1: direct MuPDF page composition - C-level PDF
+            # assembly, JPEG streams embedded without re-encoding
+            if await loop.run_in_executor(
+                self.executor,
+                self._images_to_pdf_mupdf,
+                image_paths, output_path, add_metadata
+            ):
+                return True
+
+            # Method 2: reportlab flowable layout
             return await loop.run_in_executor(
-                self.executor, 
-                self._images_to_pdf_sync, 
+                self.executor,
+                self._images_to_pdf_sync,
                 image_paths, output_path, quality, add_metadata
             )
         except Exception as e:
             self.logger.error(f"Error converting images to PDF: {e}")
             return False
+
+    def _images_to_pdf_mupdf(self, image_paths: List[str],
+                             output_path: Union[str, BinaryIO],
+                             add_metadata: bool) -> bool:
+        """Compose an image-per-page PDF directly with MuPDF
+
+        Skips reportlab's flowable framing and page-break machinery
+        entirely; insert_image passes JPEG streams through to the PDF
+        verbatim, so no decode or recompress happens for photos.
+        """
+        try:
+            page_width, page_height = A4
+            margin = 36
+            # Same 5% safety margin as the reportlab path
+            safe_width = (page_width - 2 * margin) * 0.95
+            safe_height = (page_height - 2 * margin) * 0.95
+
+            out = fitz.open()
+            try:
+                for img_path in image_paths:
+                    # Verify image exists
+                    if not os.path.exists(img_path):
+                        self.logger.error(f"Image file not found: {img_path}")
+                        continue
+                    try:
+                        # Header-only open just for the dimensions
+                        with Image.open(img_path) as img:
+                            img_width, img_height = img.size
+
+                        scale = min(safe_width / img_width, safe_height / img_height, 1.0)
+                        final_width = img_width * scale
+                        final_height = img_height * scale
+                        x0 = (page_width - final_width) / 2
+
+                        page = out.new_page(width=page_width, height=page_height)
+                        page.insert_image(
+                            fitz.Rect(x0, margin, x0 + final_width, margin + final_height),
+                            filename=img_path
+                        )
+                    except Exception as img_error:
+                        self.logger.error(f"Error placing image {img_path}: {img_error}")
+                        continue
+
+                if out.page_count == 0:
+                    self.logger.error("No images could be processed")
+                    return False
+
+                if add_metadata:
+                    out.set_metadata({
+                        'title': "Converted Images",
+                        'author': "TelegramBot",
+                        'creator': "Advanced Document Converter"
+                    })
+
+                if isinstance(output_path, str):
+                    out.save(output_path, deflate=True, garbage=4)
+                else:
+                    output_path.write(out.tobytes(deflate=True, garbage=4))
+                self.logger.info(f"PDF successfully created: {output_path}")
+                return True
+            finally:
+                out.close()
+
+        except Exception as e:
+            self.logger.warning(f"MuPDF image composition failed: {e}")
+            return False
     
-    def _images_to_pdf_sync(self, image_paths: List[str], output_path: str, 
+    def _images_to_pdf_sync(self, image_paths: List[str],
+                           output_path: Union[str, BinaryIO],
                            quality: str, add_metadata: bool) -> bool:
-        """Fixed synchronous image to PDF conversion"""
+        """Fixed synchronous image to PDF conversion
+
+        SimpleDocTemplate writes to paths and binary streams alike.
+        """
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Image as RLImage, PageBreak
-            
+            # Metadata goes into the /Info dict during the build pass, so
+            # the finished PDF never needs to be reopened for a second write
+            metadata = {}
+            if add_metadata:
+                metadata = {
+                    'title': "Converted Images",
+                    'author': "TelegramBot",
+                    'creator': "Advanced Document Converter"
+                }
+
             # Create PDF with standard margins
             doc = SimpleDocTemplate(
-                output_path, 
+                output_path,
                 pagesize=A4,
                 rightMargin=36,  # 0.5 inch
                 leftMargin=36,
                 topMargin=36,
-                bottomMargin=36
+                bottomMargin=36,
+                **metadata
             )
             
             elements = []
-            
+            # In-memory image streams must outlive doc.build(), which re-reads
+            # its sources during rendering.
+            image_buffers = []
+
             # Get usable page dimensions
             page_width, page_height = A4
             margin = 36
             max_width = page_width - 2 * margin  # 523.27
             max_height = page_height - 2 * margin  # 806.89
-            
+            # 5% safety margin, computed once rather than per image
+            safe_width = max_width * 0.95
+            safe_height = max_height * 0.95
+
             self.logger.info(f"PDF page dimensions: {page_width}x{page_height}")
             self.logger.info(f"Available space: {max_width}x{max_height}")
             
@@ -84,48 +279,47 @@ class DocumentConverter:
                         self.logger.error(f"Image file not found: {img_path}")
                         continue
                     
-                    # Clean up any enhanced image chains to avoid long filenames
-                    if 'enhanced' in img_path and len(os.path.basename(img_path)) > 50:
-                        # Create a clean copy
-                        base_dir = os.path.dirname(img_path)
-                        clean_name = f"clean_img_{i}_{uuid.uuid4().hex[:8]}.jpg"
-                        clean_path = os.path.join(base_dir, clean_name)
-                        
-                        # Copy and optimize the image
-                        with Image.open(img_path) as img:
-                            if img.mode not in ['RGB', 'L']:
-                                img = img.convert('RGB')
-                            img.save(clean_path, 'JPEG', quality=85, optimize=True)
-                        
-                        img_path = clean_path
-                    
                     # Get image dimensions
                     with Image.open(img_path) as img:
                         img_width, img_height = img.size
                         self.logger.info(f"Image {i+1}: {img_width}x{img_height}")
                         
-                        # Calculate scale to fit within page bounds with safety margin
-                        scale_x = (max_width * 0.95) / img_width  # 5% safety margin
-                        scale_y = (max_height * 0.95) / img_height
-                        scale = min(scale_x, scale_y, 1.0)  # Never upscale
-                        
-                        # Calculate final dimensions
+                        # Scale to fit within the page bounds, never upscale.
+                        # The 5% safety margin already guarantees the result
+                        # stays inside max_width/max_height, so no re-check
+                        # is needed afterwards.
+                        scale = min(safe_width / img_width, safe_height / img_height, 1.0)
                         final_width = img_width * scale
                         final_height = img_height * scale
-                        
-                        # Ensure we don't exceed bounds (double safety check)
-                        if final_width > max_width:
-                            final_width = max_width * 0.9
-                            final_height = (final_width / img_width) * img_height
-                        
-                        if final_height > max_height:
-                            final_height = max_height * 0.9
-                            final_width = (final_height / img_height) * img_width
-                        
+
                         self.logger.info(f"Final size: {final_width}x{final_height}")
-                        
+
+                        img_source = img_path
+                        # Enhanced image chains can carry unwieldy long
+                        # filenames; those get re-encoded in memory instead
+                        # of writing a cleaned JPEG copy back to disk.
+                        needs_reencode = ('enhanced' in img_path
+                                          and len(os.path.basename(img_path)) > 50)
+                        if img.format == 'JPEG' and scale <= 0.5:
+                            # Camera-size JPEG being shrunk to page fit:
+                            # draft() lets libjpeg downscale in the DCT
+                            # domain during decode (1/2, 1/4, 1/8), skipping
+                            # most of the IDCT work. Re-encode the smaller
+                            # image in memory so reportlab embeds that
+                            # instead of re-reading the full-size original.
+                            img.draft('RGB', (int(final_width) * 2, int(final_height) * 2))
+                            needs_reencode = True
+                        if needs_reencode:
+                            if img.mode not in ['RGB', 'L']:
+                                img = img.convert('RGB')
+                            buf = io.BytesIO()
+                            img.save(buf, 'JPEG', quality=85, optimize=True)
+                            buf.seek(0)
+                            image_buffers.append(buf)
+                            img_source = buf
+
                         # Add image to PDF with fixed dimensions
-                        rl_img = RLImage(img_path, width=final_width, height=final_height)
+                        rl_img = RLImage(img_source, width=final_width, height=final_height)
                         elements.append(rl_img)
                         
                         # Add page break except for last image
@@ -141,11 +335,6 @@ class DocumentConverter:
                 # Build PDF
                 doc.build(elements)
                 self.logger.info(f"PDF successfully created: {output_path}")
-                
-                # Add metadata if requested
-                if add_metadata:
-                    self._add_pdf_metadata(output_path)
-                
                 return True
             else:
                 self.logger.error("No images could be processed")
@@ -155,23 +344,6 @@ class DocumentConverter:
             self.logger.error(f"Error in _images_to_pdf_sync: {e}")
             return False
     
-    def _add_pdf_metadata(self, pdf_path: str):
-        """Add metadata to PDF"""
-        try:
-            doc = fitz.open(pdf_path)
-            metadata = {
-                "title": "Converted Images",
-                "author": "TelegramBot",
-                "creator": "Advanced Document Converter",
-                "creationDate": datetime.now(),
-                "modDate": datetime.now()
-            }
-            doc.set_metadata(metadata)
-            doc.save(pdf_path, incremental=True)
-            doc.close()
-        except Exception as e:
-            self.logger.warning(f"Could not add metadata: {e}")
-    
     async def pdf_to_images(self, pdf_path: str, output_dir: str, 
                            quality: str = 'medium', format: str = 'PNG') -> List[str]:
         """Convert PDF pages to images with quality options"""
@@ -186,7 +358,7 @@ class DocumentConverter:
             self.logger.error(f"Error converting PDF to images: {e}")
             return []
     
-    def _pdf_to_images_sync(self, pdf_path: str, output_dir: str, 
+    def _pdf_to_images_sync(self, pdf_path: str, output_dir: str,
                            quality: str, format: str) -> List[str]:
         """Synchronous PDF to images conversion"""
         try:
@@ -194,35 +366,59 @@ class DocumentConverter:
             if not os.path.exists(pdf_path):
                 self.logger.error(f"PDF file not found: {pdf_path}")
                 return []
-                
+
             doc = fitz.open(pdf_path)
-            image_paths = []
+            page_count = doc.page_count
+            doc.close()
             dpi = self.config.image_quality.get(quality, 150)
-            
-            for page_num in range(doc.page_count):
+
+            if page_count <= 1:
+                path = self._render_page(pdf_path, 0, output_dir, dpi, format)
+                return [path] if path else []
+
+            # Pages are independent and MuPDF releases the GIL while
+            # rendering, so rasterize them in parallel. Each worker opens
+            # its own document handle: fitz contexts are not thread-safe.
+            workers = min(page_count, self.config.max_concurrent_conversions)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(
+                    lambda n: self._render_page(pdf_path, n, output_dir, dpi, format),
+                    range(page_count)
+                )
+            return [path for path in results if path]
+
+        except Exception as e:
+            self.logger.error(f"Error in _pdf_to_images_sync: {e}")
+            return []
+
+    def _render_page(self, pdf_path: str, page_num: int, output_dir: str,
+                     dpi: int, format: str) -> str:
+        """Rasterize a single PDF page with a worker-local document handle"""
+        try:
+            doc = fitz.open(pdf_path)
+            try:
                 page = doc[page_num]
                 mat = fitz.Matrix(dpi/72, dpi/72)
                 pix = page.get_pixmap(matrix=mat)
-                
+
                 img_path = os.path.join(output_dir, f"page_{page_num + 1:03d}.{format.lower()}")
-                
+
                 if format.upper() == 'PNG':
                     pix.save(img_path)
+                elif format.upper() == 'JPEG':
+                    # pil_save hands the raw samples buffer straight to
+                    # Pillow's encoder, skipping the PPM serialize/re-parse
+                    # round trip over the full pixel buffer
+                    pix.pil_save(img_path, format='JPEG', quality=95, optimize=True)
                 else:
-                    # Convert to PIL for other formats
-                    img_data = pix.tobytes("ppm")
-                    img = Image.open(io.BytesIO(img_data))
-                    img.save(img_path, format.upper(), quality=95 if format.upper() == 'JPEG' else None)
-                
-                image_paths.append(img_path)
-                pix = None  # Free memory
-            
-            doc.close()
-            return image_paths
-            
+                    pix.pil_save(img_path, format=format.upper())
+
+                return img_path
+            finally:
+                doc.close()
         except Exception as e:
-            self.logger.error(f"Error in _pdf_to_images_sync: {e}")
-            return []
+            self.logger.error(f"Error rendering page {page_num + 1}: {e}")
+            return ""
 
     async def excel_to_pdf(self, excel_path: str, output_path: str) -> bool:
         """ENHANCED Excel to PDF conversion with proper formatting and layout"""
@@ -243,39 +439,46 @@ class DocumentConverter:
             self.logger.error(f"Error converting Excel to PDF: {e}")
             return False
 
+    async def _soffice_convert(self, input_path: str, output_path: str) -> bool:
+        """Run a headless LibreOffice conversion with an isolated profile"""
+        if self._lo_cmd is None:
+            return False
+
+        # Concurrent soffice processes sharing the default user profile
+        # serialize on its lock file, silently defeating
+        # max_concurrent_conversions. A throwaway profile dir per
+        # invocation lets conversions actually run in parallel.
+        profile_dir = os.path.join(tempfile.gettempdir(), f"lo_profile_{uuid.uuid4().hex}")
+        profile_arg = f"-env:UserInstallation=file://{profile_dir}"
+        try:
+            cmd = [self._lo_cmd, '--headless', profile_arg, '--convert-to', 'pdf',
+                   '--outdir', os.path.dirname(output_path), input_path]
+            result = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await result.communicate()
+
+            # LibreOffice creates file with same name but .pdf extension
+            expected_output = os.path.join(
+                os.path.dirname(output_path),
+                os.path.splitext(os.path.basename(input_path))[0] + '.pdf'
+            )
+
+            if os.path.exists(expected_output):
+                if expected_output != output_path:
+                    shutil.move(expected_output, output_path)
+                return True
+
+            return False
+        finally:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
     async def _convert_excel_with_libreoffice(self, excel_path: str, output_path: str) -> bool:
         """Convert Excel using LibreOffice - preserves formatting best"""
         try:
-            # Try different LibreOffice commands
-            commands = [
-                ['libreoffice', '--headless', '--convert-to', 'pdf', '--outdir', os.path.dirname(output_path), excel_path],
-                ['soffice', '--headless', '--convert-to', 'pdf', '--outdir', os.path.dirname(output_path), excel_path]
-            ]
-            
-            for cmd in commands:
-                try:
-                    result = await asyncio.create_subprocess_exec(
-                        *cmd, 
-                        stdout=asyncio.subprocess.PIPE, 
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await result.communicate()
-                    
-                    # LibreOffice creates file with same name but .pdf extension
-                    expected_output = os.path.join(
-                        os.path.dirname(output_path),
-                        os.path.splitext(os.path.basename(excel_path))[0] + '.pdf'
-                    )
-                    
-                    if os.path.exists(expected_output):
-                        if expected_output != output_path:
-                            shutil.move(expected_output, output_path)
-                        return True
-                except FileNotFoundError:
-                    continue
-            
-            return False
-            
+            return await self._soffice_convert(excel_path, output_path)
         except Exception as e:
             self.logger.warning(f"LibreOffice Excel conversion failed: {e}")
             return False
@@ -301,15 +504,17 @@ class DocumentConverter:
                 self.logger.error(f"Excel file not found: {excel_path}")
                 return False
                 
-            # Read Excel file with openpyxl to preserve formatting
-            wb = openpyxl.load_workbook(excel_path, data_only=False)
+            # Read Excel file with openpyxl's streaming reader: read_only
+            # skips building the full in-memory cell grid, which matters
+            # for workbooks far larger than the slice we render.
+            wb = openpyxl.load_workbook(excel_path, data_only=False, read_only=True)
             
             # Create PDF
             doc = SimpleDocTemplate(output_path, pagesize=A4, 
                                   rightMargin=30, leftMargin=30, 
                                   topMargin=30, bottomMargin=30)
             elements = []
-            styles = getSampleStyleSheet()
+            styles = self._styles
             
             for sheet_name in wb.sheetnames:
                 ws = wb[sheet_name]
@@ -319,77 +524,29 @@ class DocumentConverter:
                 elements.append(title)
                 elements.append(Spacer(1, 12))
                 
-                # Get actual data range (not just used cells)
-                max_row = ws.max_row
-                max_col = ws.max_column
-                
+                # Get actual data range (read-only sheets report None when
+                # the dimensions record is missing)
+                max_row = ws.max_row or 0
+                max_col = ws.max_column or 0
+
                 if max_row > 0 and max_col > 0:
-                    # Create table data with proper formatting
-                    table_data = []
-                    
                     # Limit to reasonable size for PDF
                     display_rows = min(max_row, 50)
                     display_cols = min(max_col, 10)
-                    
-                    for row_idx in range(1, display_rows + 1):
-                        row_data = []
-                        for col_idx in range(1, display_cols + 1):
-                            cell = ws.cell(row=row_idx, column=col_idx)
-                            
-                            # Get cell value with proper formatting
-                            if cell.value is not None:
-                                # Handle different data types
-                                if isinstance(cell.value, (int, float)):
-                                    if cell.number_format and cell.number_format != 'General':
-                                        # Try to format numbers according to Excel format
-                                        cell_text = str(cell.value)
-                                    else:
-                                        cell_text = str(cell.value)
-                                elif isinstance(cell.value, datetime):
-                                    cell_text = cell.value.strftime('%Y-%m-%d %H:%M:%S')
-                                else:
-                                    cell_text = str(cell.value)
-                            else:
-                                cell_text = ""
-                            
-                            # Limit cell content length for PDF
-                            if len(cell_text) > 30:
-                                cell_text = cell_text[:27] + "..."
-                            
-                            row_data.append(cell_text)
-                        
-                        table_data.append(row_data)
-                    
+
+                    # iter_rows with values_only streams raw value tuples
+                    # straight out of the parsed XML, without materializing
+                    # a Cell object (and its style lookups) per access.
+                    table_data = [
+                        [_format_cell(value) for value in row]
+                        for row in ws.iter_rows(min_row=1, max_row=display_rows,
+                                                max_col=display_cols, values_only=True)
+                    ]
+
                     if table_data:
                         # Create table with proper styling
                         table = Table(table_data, hAlign='LEFT')
-                        
-                        # Apply table styling
-                        table_style = TableStyle([
-                            # Basic table structure
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),  # Header row
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                            ('FONTSIZE', (0, 0), (-1, 0), 10),
-                            ('FONTSIZE', (0, 1), (-1, -1), 8),
-                            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                            
-                            # Grid lines
-                            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.black),
-                            
-                            # Alternating row colors
-                            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-                            
-                            # Cell padding
-                            ('LEFTPADDING', (0, 0), (-1, -1), 3),
-                            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-                            ('TOPPADDING', (0, 0), (-1, -1), 3),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-                        ])
-                        
-                        table.setStyle(table_style)
+                        table.setStyle(_EXCEL_TABLE_STYLE)
                         elements.append(table)
                         
                         # Add info if data was truncated
@@ -404,7 +561,10 @@ class DocumentConverter:
                 
                 # Add space between sheets
                 elements.append(Spacer(1, 24))
-            
+
+            # Read-only workbooks keep the source file open until closed
+            wb.close()
+
             if elements:
                 doc.build(elements)
                 return True
@@ -430,7 +590,7 @@ class DocumentConverter:
             if await self._convert_with_pandoc(docx_path, output_path):
                 return True
                 
-            # Method 3: Basic conversion using python-docx + reportlab
+            # Method 3: Basic conversion using lxml + reportlab
             return await self._convert_docx_basic(docx_path, output_path)
             
         except Exception as e:
@@ -440,44 +600,17 @@ class DocumentConverter:
     async def _convert_with_libreoffice(self, input_path: str, output_path: str) -> bool:
         """Convert using LibreOffice"""
         try:
-            # Try different LibreOffice commands
-            commands = [
-                ['libreoffice', '--headless', '--convert-to', 'pdf', '--outdir', os.path.dirname(output_path), input_path],
-                ['soffice', '--headless', '--convert-to', 'pdf', '--outdir', os.path.dirname(output_path), input_path]
-            ]
-            
-            for cmd in commands:
-                try:
-                    result = await asyncio.create_subprocess_exec(
-                        *cmd, 
-                        stdout=asyncio.subprocess.PIPE, 
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await result.communicate()
-                    
-                    # LibreOffice creates file with same name but .pdf extension
-                    expected_output = os.path.join(
-                        os.path.dirname(output_path),
-                        os.path.splitext(os.path.basename(input_path))[0] + '.pdf'
-                    )
-                    
-                    if os.path.exists(expected_output):
-                        if expected_output != output_path:
-                            shutil.move(expected_output, output_path)
-                        return True
-                except FileNotFoundError:
-                    continue
-            
-            return False
-            
+            return await self._soffice_convert(input_path, output_path)
         except Exception as e:
             self.logger.warning(f"LibreOffice conversion failed: {e}")
             return False
     
     async def _convert_with_pandoc(self, input_path: str, output_path: str) -> bool:
         """Convert using Pandoc"""
+        if self._pandoc_cmd is None:
+            return False
         try:
-            cmd = ['pandoc', input_path, '-o', output_path]
+            cmd = [self._pandoc_cmd, input_path, '-o', output_path]
             result = await asyncio.create_subprocess_exec(
                 *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
             )
@@ -508,21 +641,31 @@ class DocumentConverter:
                 self.logger.error(f"DOCX file not found: {docx_path}")
                 return False
                 
-            doc = DocxDocument(docx_path)
-            
+            # Parse word/document.xml directly with lxml: python-docx wraps
+            # every <w:p> in a Paragraph object whose text property walks
+            # the style chain through Python descriptors, which dominates
+            # runtime for long documents when all we need is the raw text
+            with zipfile.ZipFile(docx_path) as archive:
+                with archive.open('word/document.xml') as doc_xml:
+                    body = etree.parse(doc_xml).getroot().find(_W_BODY)
+
             # Create PDF
             pdf_doc = SimpleDocTemplate(output_path, pagesize=A4)
             elements = []
-            styles = getSampleStyleSheet()
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    # Clean text and handle special characters
-                    text = paragraph.text.replace('\n', '<br/>')
-                    text = text.replace('\t', '    ')
-                    p = Paragraph(text, styles['Normal'])
-                    elements.append(p)
-                    elements.append(Spacer(1, 12))
+            styles = self._styles
+
+            if body is not None:
+                # Body-level <w:p> children match doc.paragraphs from the
+                # old python-docx path (table paragraphs stay excluded)
+                for para in body.iterchildren(_W_P):
+                    text = _paragraph_text(para)
+                    if text.strip():
+                        # Clean text and handle special characters
+                        text = text.replace('\n', '<br/>')
+                        text = text.replace('\t', '    ')
+                        p = Paragraph(text, styles['Normal'])
+                        elements.append(p)
+                        elements.append(Spacer(1, 12))
             
             if elements:
                 pdf_doc.build(elements)
@@ -544,8 +687,12 @@ class DocumentConverter:
             original_format = img.format or 'JPEG'
             
             if enhancement_type == 'brightness':
-                enhancer = ImageEnhance.Brightness(img)
-                img = enhancer.enhance(strength)
+                if img.mode in ('RGB', 'L'):
+                    # Single vectorized LUT pass instead of the generic
+                    # interpolation blend in ImageEnhance.Brightness
+                    img = img.point(_brightness_lut(strength) * len(img.getbands()))
+                else:
+                    img = ImageEnhance.Brightness(img).enhance(strength)
             elif enhancement_type == 'contrast':
                 enhancer = ImageEnhance.Contrast(img)
                 img = enhancer.enhance(strength)
@@ -556,12 +703,19 @@ class DocumentConverter:
                 enhancer = ImageEnhance.Color(img)
                 img = enhancer.enhance(strength)
             elif enhancement_type == 'auto_enhance':
-                # Auto enhance: apply multiple enhancements
-                img = ImageEnhance.Brightness(img).enhance(1.1)
-                img = ImageEnhance.Contrast(img).enhance(1.2)
+                # Auto enhance: brightness and contrast fold into one LUT
+                # pass; only the sharpness convolution needs its own walk
+                if img.mode in ('RGB', 'L'):
+                    img = img.point(_AUTO_ENHANCE_LUT * len(img.getbands()))
+                else:
+                    img = ImageEnhance.Brightness(img).enhance(1.1)
+                    img = ImageEnhance.Contrast(img).enhance(1.2)
                 img = ImageEnhance.Sharpness(img).enhance(1.1)
             elif enhancement_type == 'grayscale':
-                img = img.convert('L').convert('RGB')
+                # Broadcast the single L plane into three bands instead of
+                # running a second convert('RGB') pass over it
+                gray = img.convert('L')
+                img = Image.merge('RGB', (gray, gray, gray))
             elif enhancement_type == 'blur':
                 img = img.filter(ImageFilter.GaussianBlur(radius=2))
             
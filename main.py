@@ -4,11 +4,14 @@ Main entry point for the Telegram Document Converter Bot
 Modular version with separated components
 """
 
+import io
 import os
 import sys
+import asyncio
 import tempfile
 import shutil
 import logging
+import threading
 from datetime import datetime
 
 from telegram.ext import (
@@ -20,12 +23,37 @@ from telegram.ext import (
 from config.config import BotConfig
 from utils.logging_setup import setup_logging
 from utils.security import SecurityManager
+from utils.user_store import UserDataStore
 from converters.document_converter import DocumentConverter
 from bot.handlers import BotHandlers
 from bot.file_handlers import FileHandlers
 from bot.callback_handlers import CallbackHandlers
 from bot.conversation_handlers import ConversationHandlers, WAITING_FOR_NAME
 
+# Combined document filters, composed once at import time rather than
+# on every setup pass
+_WORD_FILTER = (
+    filters.Document.MimeType("application/vnd.openxmlformats-officedocument.wordprocessingml.document") |
+    filters.Document.FileExtension("docx") | filters.Document.FileExtension("doc")
+)
+_EXCEL_FILTER = (
+    filters.Document.MimeType("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet") |
+    filters.Document.FileExtension("xlsx") | filters.Document.FileExtension("xls")
+)
+
+# Distinguishes "no pending request" from a stored falsy value when
+# popping request keys from user state
+_NO_REQUEST = object()
+
+# Document info display: label, user-state key and missing-document
+# message per info type
+_DOC_INFO_TABLE = {
+    "pdf": ("📄 PDF", 'current_pdf', "❌ No PDF found"),
+    "word": ("📝 Word", 'current_word', "❌ No Word document found"),
+    "excel": ("📊 Excel", 'current_excel', "❌ No Excel file found"),
+    "text": ("📝 Text", 'current_text', "❌ No text document found"),
+}
+
 
 class TelegramDocumentBot:
     """Main bot class that orchestrates all components"""
@@ -34,17 +62,29 @@ class TelegramDocumentBot:
         # Load configuration
         self.config = BotConfig()
         
-        # Setup logging
-        setup_logging(self.config)
+        # Setup logging (keep the listener so cleanup can flush it)
+        self._log_listener = setup_logging(self.config)
         self.logger = logging.getLogger(__name__)
         
         # Initialize components
-        self.user_data = {}
+        # Bounded LRU so per-user state can't grow without limit; evicted
+        # users' stats/settings go to the optional cold store.
+        self.user_data = UserDataStore(
+            maxsize=self.config.user_cache_size,
+            cold_dir=self.config.user_data_dir,
+            default_factory=self._default_user_state
+        )
         self.security = SecurityManager()
         self.converter = DocumentConverter(self.config)
         
-        # Create temp directory
-        self.temp_base_dir = tempfile.mkdtemp(prefix='telegram_bot_')
+        # Create temp directory. Prefer RAM-backed /dev/shm when available so
+        # downloads and image reads never touch spinning/network storage —
+        # the contents are recoverable download artifacts, so volatility on
+        # reboot is fine. TEMP_DIR overrides the choice.
+        temp_root = self.config.temp_dir
+        if temp_root is None and os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+            temp_root = '/dev/shm'
+        self.temp_base_dir = tempfile.mkdtemp(prefix='telegram_bot_', dir=temp_root)
         
         # Initialize handlers
         self.bot_handlers = BotHandlers(self.config, self.user_data, self.security)
@@ -53,11 +93,67 @@ class TelegramDocumentBot:
         self.conversation_handlers = ConversationHandlers(self.user_data, self.security)
         
         # Setup Telegram application
-        self.application = Application.builder().token(self.config.telegram_bot_token).build()
+        # A larger connection pool lets bursts of concurrent callbacks reuse
+        # warm HTTPS connections instead of queueing on the default pool of 1.
+        # The TLS handshake itself is paid once at startup: run_polling's
+        # initialize step already issues get_me() through the shared client.
+        # getUpdates runs on its own client in PTB v20, so long PDF uploads
+        # (hence the generous write timeout) can't starve polling.
+        self.application = (
+            Application.builder()
+            .token(self.config.telegram_bot_token)
+            .connection_pool_size(256)
+            .pool_timeout(10.0)
+            .connect_timeout(20.0)
+            .read_timeout(60.0)
+            .write_timeout(120.0)
+            .post_init(self._post_init)
+            .build()
+        )
         self.setup_handlers()
-        
+
+        # O(1) dispatch tables built once, replacing the if/elif ladders
+        # that grew with every new conversion type
+        self._conversion_dispatch = {
+            "images_pdf": self.convert_images_to_pdf,
+            "pdf_images": self.convert_pdf_to_images,
+            "word_pdf": self.convert_word_to_pdf,
+            "excel_pdf": self.convert_excel_to_pdf,
+            "text_pdf": self.convert_text_to_pdf,
+        }
+        # (request-key, handler) pairs checked after every callback, in
+        # the same precedence order as the old elif chain
+        self._callback_requests = (
+            ('requested_conversion', self.execute_conversion),
+            ('requested_enhancement', self.apply_enhancement),
+            ('requested_info', self.show_document_info),
+            ('requested_action', self.execute_action),
+            ('execute_conversion', self.execute_conversion_with_custom_name),
+        )
+
         self.logger.info("Bot initialized successfully")
 
+    def _default_user_state(self) -> dict:
+        """Fresh per-user state, created on first access to an unknown user"""
+        return {
+            'images': [],
+            'conversions': 0,
+            'files_processed': 0,
+            'join_date': datetime.now().isoformat(),
+            'last_used': datetime.now().isoformat(),
+            'settings': {
+                'quality': self.config.default_image_quality,
+                'format': self.config.default_output_format,
+                'auto_enhance': self.config.auto_enhance_default
+            },
+            'pending_conversion': None,  # For custom naming
+            'custom_filename': None
+        }
+
+    async def _post_init(self, application):
+        """Start background maintenance once the event loop is running"""
+        application.create_task(self.file_handlers._gc_loop())
+
     def setup_handlers(self):
         """Setup all command and message handlers"""
         
@@ -74,38 +170,34 @@ class TelegramDocumentBot:
             conversation_timeout=300  # 5 minutes timeout
         )
         
-        # Command handlers
-        self.application.add_handler(CommandHandler("start", self.bot_handlers.start_command))
-        self.application.add_handler(CommandHandler("help", self.bot_handlers.help_command))
-        self.application.add_handler(CommandHandler("stats", self.bot_handlers.stats_command))
-        self.application.add_handler(CommandHandler("clear", self.bot_handlers.clear_session))
-        self.application.add_handler(CommandHandler("settings", self.bot_handlers.settings_command))
-        self.application.add_handler(CommandHandler("formats", self.bot_handlers.formats_command))
-        self.application.add_handler(CommandHandler("cancel", self.bot_handlers.cancel_naming))
-        
-        # Add conversation handler
-        self.application.add_handler(conv_handler)
-        
-        # File handlers
-        self.application.add_handler(MessageHandler(filters.PHOTO, self.file_handlers.handle_photo))
-        self.application.add_handler(MessageHandler(filters.Document.PDF, self.file_handlers.handle_pdf))
-        self.application.add_handler(MessageHandler(
-            filters.Document.MimeType("application/vnd.openxmlformats-officedocument.wordprocessingml.document") |
-            filters.Document.FileExtension("docx") | filters.Document.FileExtension("doc"),
-            self.file_handlers.handle_word
-        ))
-        self.application.add_handler(MessageHandler(
-            filters.Document.MimeType("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet") |
-            filters.Document.FileExtension("xlsx") | filters.Document.FileExtension("xls"),
-            self.file_handlers.handle_excel
-        ))
-        self.application.add_handler(MessageHandler(filters.Document.IMAGE, self.file_handlers.handle_document_image))
-        self.application.add_handler(MessageHandler(filters.Document.TEXT, self.file_handlers.handle_text_document))
-        self.application.add_handler(MessageHandler(filters.Document.ALL, self.file_handlers.handle_other_document))
-        
-        # Callback query handler
-        self.application.add_handler(CallbackQueryHandler(self.handle_callback_with_conversions))
-        
+        # Register everything in one bulk call; list order matches the
+        # old add_handler sequence, so dispatch precedence is unchanged
+        self.application.add_handlers([
+            # Command handlers
+            CommandHandler("start", self.bot_handlers.start_command),
+            CommandHandler("help", self.bot_handlers.help_command),
+            CommandHandler("stats", self.bot_handlers.stats_command),
+            CommandHandler("clear", self.bot_handlers.clear_session),
+            CommandHandler("settings", self.bot_handlers.settings_command),
+            CommandHandler("formats", self.bot_handlers.formats_command),
+            CommandHandler("cancel", self.bot_handlers.cancel_naming),
+
+            # Conversation handler for custom naming
+            conv_handler,
+
+            # File handlers
+            MessageHandler(filters.PHOTO, self.file_handlers.handle_photo),
+            MessageHandler(filters.Document.PDF, self.file_handlers.handle_pdf),
+            MessageHandler(_WORD_FILTER, self.file_handlers.handle_word),
+            MessageHandler(_EXCEL_FILTER, self.file_handlers.handle_excel),
+            MessageHandler(filters.Document.IMAGE, self.file_handlers.handle_document_image),
+            MessageHandler(filters.Document.TEXT, self.file_handlers.handle_text_document),
+            MessageHandler(filters.Document.ALL, self.file_handlers.handle_other_document),
+
+            # Callback query handler
+            CallbackQueryHandler(self.handle_callback_with_conversions),
+        ])
+
         # Error handler
         self.application.add_error_handler(self.bot_handlers.error_handler)
 
@@ -117,47 +209,34 @@ class TelegramDocumentBot:
         # Check if a conversion was requested
         user_id = update.callback_query.from_user.id
         
-        if user_id in self.user_data:
-            # Handle conversion requests
-            if 'requested_conversion' in self.user_data[user_id]:
-                conversion_type = self.user_data[user_id].pop('requested_conversion')
-                await self.execute_conversion(update, context, conversion_type)
-            
-            # Handle enhancement requests
-            elif 'requested_enhancement' in self.user_data[user_id]:
-                enhancement_type = self.user_data[user_id].pop('requested_enhancement')
-                await self.apply_enhancement(update, context, enhancement_type)
-            
-            # Handle info requests
-            elif 'requested_info' in self.user_data[user_id]:
-                info_type = self.user_data[user_id].pop('requested_info')
-                await self.show_document_info(update, context, info_type)
-            
-            # Handle action requests
-            elif 'requested_action' in self.user_data[user_id]:
-                action = self.user_data[user_id].pop('requested_action')
-                await self.execute_action(update, context, action)
-            
-            # Handle post-conversation conversions
-            elif 'execute_conversion' in self.user_data[user_id]:
-                conversion_type = self.user_data[user_id].pop('execute_conversion')
-                await self.execute_conversion_with_custom_name(update, context, conversion_type)
+        if user_id not in self.user_data:
+            return
+
+        user_state = self.user_data[user_id]
+        for key, handler in self._callback_requests:
+            # Single pop instead of an `in` probe followed by a second
+            # hashed lookup for the same key
+            value = user_state.pop(key, _NO_REQUEST)
+            if value is not _NO_REQUEST:
+                # The callback handler queued a placeholder edit for this
+                # message; flush it before the handlers below issue direct
+                # edits, or the two could race onto separate connections
+                # and land out of order.
+                message = update.callback_query.message
+                await self.callback_handlers.flush_edits(
+                    message.chat_id, message.message_id
+                )
+                await handler(update, context, value)
+                return
 
     async def execute_conversion(self, update, context, conversion_type):
         """Execute the requested conversion"""
         user_id = update.callback_query.from_user.id
         
         try:
-            if conversion_type == "images_pdf":
-                await self.convert_images_to_pdf(update, context)
-            elif conversion_type == "pdf_images":
-                await self.convert_pdf_to_images(update, context)
-            elif conversion_type == "word_pdf":
-                await self.convert_word_to_pdf(update, context)
-            elif conversion_type == "excel_pdf":
-                await self.convert_excel_to_pdf(update, context)
-            elif conversion_type == "text_pdf":
-                await self.convert_text_to_pdf(update, context)
+            handler = self._conversion_dispatch.get(conversion_type)
+            if handler:
+                await handler(update, context)
         except Exception as e:
             self.logger.error(f"Error executing conversion {conversion_type}: {e}")
             await update.callback_query.edit_message_text("❌ Error during conversion. Please try again.")
@@ -172,18 +251,26 @@ class TelegramDocumentBot:
         """Apply image enhancement"""
         user_id = update.callback_query.from_user.id
         images = self.user_data[user_id].get('images', [])
-        
+
         if not images:
             await update.callback_query.edit_message_text("❌ No images to enhance!")
             return
-        
+
         try:
-            enhanced_images = []
-            for img_path in images:
-                enhanced_path = self.converter.enhance_image(img_path, enhancement_type)
-                enhanced_images.append(enhanced_path)
-            
-            self.user_data[user_id]['images'] = enhanced_images
+            # enhance_image is CPU-bound Pillow work that would otherwise
+            # block the event loop for every other user. Fan the images out
+            # over the converter's executor — Pillow releases the GIL in
+            # its C kernels, so they genuinely run in parallel.
+            loop = asyncio.get_running_loop()
+            enhanced_images = await asyncio.gather(*[
+                loop.run_in_executor(
+                    self.converter.executor,
+                    self.converter.enhance_image, img_path, enhancement_type
+                )
+                for img_path in images
+            ])
+
+            self.user_data[user_id]['images'] = list(enhanced_images)
             await update.callback_query.edit_message_text(
                 f"✅ {enhancement_type.title()} enhancement applied to {len(enhanced_images)} images!"
             )
@@ -195,33 +282,17 @@ class TelegramDocumentBot:
         """Show document information"""
         user_id = update.callback_query.from_user.id
         
-        if info_type == "pdf":
-            doc = self.user_data[user_id].get('current_pdf')
-            if doc:
-                info = f"📄 PDF: {doc.file_name}\nSize: {(doc.file_size or 0) / (1024*1024):.2f} MB"
-            else:
-                info = "❌ No PDF found"
-        elif info_type == "word":
-            doc = self.user_data[user_id].get('current_word')
-            if doc:
-                info = f"📝 Word: {doc.file_name}\nSize: {(doc.file_size or 0) / (1024*1024):.2f} MB"
-            else:
-                info = "❌ No Word document found"
-        elif info_type == "excel":
-            doc = self.user_data[user_id].get('current_excel')
-            if doc:
-                info = f"📊 Excel: {doc.file_name}\nSize: {(doc.file_size or 0) / (1024*1024):.2f} MB"
-            else:
-                info = "❌ No Excel file found"
-        elif info_type == "text":
-            doc = self.user_data[user_id].get('current_text')
+        entry = _DOC_INFO_TABLE.get(info_type)
+        if entry is None:
+            info = "❌ Unknown document type"
+        else:
+            label, state_key, missing_msg = entry
+            doc = self.user_data[user_id].get(state_key)
             if doc:
-                info = f"📝 Text: {doc.file_name}\nSize: {(doc.file_size or 0) / (1024*1024):.2f} MB"
+                info = f"{label}: {doc.file_name}\nSize: {(doc.file_size or 0) / 1048576:.2f} MB"
             else:
-                info = "❌ No text document found"
-        else:
-            info = "❌ Unknown document type"
-        
+                info = missing_msg
+
         await update.callback_query.edit_message_text(info)
 
     async def execute_action(self, update, context, action):
@@ -243,31 +314,32 @@ class TelegramDocumentBot:
         await update.callback_query.edit_message_text("🔄 Converting images to PDF...")
         
         try:
-            # Create output path
-            user_temp_dir = os.path.join(self.temp_base_dir, str(user_id))
             output_filename = f"converted_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            output_path = os.path.join(user_temp_dir, output_filename)
-            
+
             # Get settings
             settings = self.user_data[user_id].get('settings', {})
             quality = settings.get('quality', 'medium')
-            
-            # Convert
-            success = await self.converter.images_to_pdf(images, output_path, quality=quality)
-            
-            if success and os.path.exists(output_path):
+
+            # Convert straight into memory: the PDF used to be written to
+            # the temp dir only to be reopened for the upload
+            pdf_buffer = io.BytesIO()
+            success = await self.converter.images_to_pdf(images, pdf_buffer, quality=quality)
+
+            if success and pdf_buffer.getbuffer().nbytes:
                 # Send PDF
-                with open(output_path, 'rb') as pdf_file:
-                    await context.bot.send_document(
-                        chat_id=update.callback_query.message.chat_id,
-                        document=pdf_file,
-                        filename=output_filename,
-                        caption="✅ PDF created successfully! 📄✨"
-                    )
-                
+                pdf_buffer.seek(0)
+                await context.bot.send_document(
+                    chat_id=update.callback_query.message.chat_id,
+                    document=pdf_buffer,
+                    filename=output_filename,
+                    caption="✅ PDF created successfully! 📄✨"
+                )
+
                 # Update stats
                 self.user_data[user_id]['conversions'] += 1
                 self.user_data[user_id]['images'] = []  # Clear after conversion
+                # Drop the cached sizes too; their paths are gone with the queue
+                self.user_data[user_id].pop('image_sizes', None)
                 
                 await update.callback_query.edit_message_text("🎉 Conversion completed!")
             else:
@@ -324,8 +396,21 @@ class TelegramDocumentBot:
     def cleanup(self):
         """Cleanup resources"""
         try:
+            # Drop any queued conversion work so shutdown doesn't wait on it
+            self.converter.executor.shutdown(wait=False, cancel_futures=True)
             if os.path.exists(self.temp_base_dir):
-                shutil.rmtree(self.temp_base_dir)
+                # Removing a tree full of page images stat-walks every
+                # entry; run it on a daemon thread so Ctrl-C returns
+                # promptly. The dir lives under tmpfs/system temp, so an
+                # unfinished sweep is reclaimed by the OS regardless.
+                threading.Thread(
+                    target=shutil.rmtree,
+                    args=(self.temp_base_dir,),
+                    kwargs={'ignore_errors': True},
+                    daemon=True
+                ).start()
+            # Flush queued log records before the process exits
+            self._log_listener.stop()
             print("🧹 Cleanup completed")
         except Exception as e:
             print(f"⚠️  Could not cleanup temp directory: {e}")
@@ -2,14 +2,22 @@
 Logging setup utilities for the Telegram Document Converter Bot
 """
 
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
+
 from config.config import BotConfig
 
 
 def setup_logging(config: BotConfig):
-    """Setup logging based on configuration"""
+    """Setup logging based on configuration
+
+    Formatting and I/O run on a QueueListener thread so log calls inside
+    async handlers never block the event loop on a write()+flush().
+    Returns the listener; call its stop() during shutdown to flush.
+    """
     handlers = []
-    
+
     # Console handler
     if config.enable_console_logging:
         console_handler = logging.StreamHandler()
@@ -17,21 +25,33 @@ def setup_logging(config: BotConfig):
             logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         )
         handlers.append(console_handler)
-    
-    # File handler
+
+    # File handler (delay=True defers opening the file until first use)
     if config.enable_file_logging and config.log_file:
         try:
-            file_handler = logging.FileHandler(config.log_file)
+            file_handler = logging.FileHandler(config.log_file, delay=True)
             file_handler.setFormatter(
                 logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             )
             handlers.append(file_handler)
         except Exception as e:
             print(f"⚠️  Could not setup file logging: {e}")
-    
-    # Configure root logger
+
+    # The root logger only enqueues records; the listener thread drains
+    # them into the real handlers in the background
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    queue_handler = QueueHandler(log_queue)
     logging.basicConfig(
         level=getattr(logging, config.log_level.upper()),
-        handlers=handlers,
+        handlers=[queue_handler],
         force=True
     )
+    # basicConfig gave the queue handler the basic formatter, which would
+    # bake "LEVEL:name:" into the message before the listener's handlers
+    # format the record again — make enqueueing a pass-through instead
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    return listener
@@ -16,6 +16,35 @@ except ImportError:
     MAGIC_AVAILABLE = False
     print("⚠️  python-magic not available. File validation will be limited.")
 
+# One Magic instance per process: magic.from_file() builds a fresh one
+# per call, reloading the multi-MB magic database every time
+_MAGIC = None
+if MAGIC_AVAILABLE:
+    try:
+        _MAGIC = magic.Magic(mime=True)
+    except Exception as e:
+        MAGIC_AVAILABLE = False
+        print(f"⚠️  Could not load libmagic database: {e}")
+
+try:
+    from blake3 import blake3  # SIMD-accelerated hashing (optional)
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    blake3 = None
+    BLAKE3_AVAILABLE = False
+
+# Anything outside the filename whitelist (alphanumerics, space and common
+# punctuation) becomes an underscore; runs of underscores/whitespace collapse
+_UNSAFE_CHARS_RE = re.compile(r'[^\w \-.()\[\]]')
+_COLLAPSE_RE = re.compile(r'[_\s]+')
+
+# All MarkdownV2 special characters, escaped in one substitution pass
+_MARKDOWN_V2_RE = re.compile(r'([_*\[\]()~`>#+\-=|{}.!])')
+
+# Characters that make a filename unsafe (path separators, drive/colon,
+# shell globs, redirects); '..' is checked separately as a substring
+_DANGEROUS_CHARS = frozenset('/\\:*?"<>|')
+
 
 class SecurityManager:
     """Handle security and validation"""
@@ -25,9 +54,10 @@ class SecurityManager:
         """Check if filename is safe"""
         if not filename:
             return False
-        
-        dangerous_chars = ['..', '/', '\\', ':', '*', '?', '"', '<', '>', '|']
-        return not any(char in filename for char in dangerous_chars)
+
+        # One scan for the forbidden set plus one substring check,
+        # instead of ten separate passes over the filename
+        return '..' not in filename and _DANGEROUS_CHARS.isdisjoint(filename)
     
     @staticmethod
     def sanitize_filename(filename: str, max_length: int = 100) -> str:
@@ -37,19 +67,11 @@ class SecurityManager:
         
         # Remove file extension to preserve it separately
         name, ext = os.path.splitext(filename)
-        
-        # Replace problematic characters but keep spaces and common punctuation
-        safe_chars = []
-        for char in name:
-            if char.isalnum() or char in ' -_.()[]':
-                safe_chars.append(char)
-            else:
-                safe_chars.append('_')
-        
-        safe_name = ''.join(safe_chars).strip()
-        
-        # Remove multiple spaces and underscores
-        safe_name = re.sub(r'[_\s]+', '_', safe_name)
+
+        # Replace problematic characters but keep spaces and common
+        # punctuation, then collapse runs — two C-level regex passes
+        # instead of a per-character Python loop
+        safe_name = _COLLAPSE_RE.sub('_', _UNSAFE_CHARS_RE.sub('_', name))
         safe_name = safe_name.strip('_')
         
         # Ensure we have a name
@@ -67,10 +89,20 @@ class SecurityManager:
     def get_file_hash(file_path: str) -> str:
         """Generate hash for file deduplication"""
         try:
-            hasher = hashlib.md5()
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hasher.update(chunk)
+            # blake3 when installed (AVX2/AVX-512 dispatch), otherwise
+            # sha256, which OpenSSL accelerates via SHA-NI on modern x86.
+            # Either way beats the old Python-chunked md5 loop.
+            hasher = blake3() if BLAKE3_AVAILABLE else hashlib.sha256()
+            buffer = bytearray(1 << 20)
+            view = memoryview(buffer)
+            # readinto with a reused 1 MiB buffer: 256x fewer read()
+            # syscalls than 4 KiB chunks, and no per-chunk allocation
+            with open(file_path, 'rb', buffering=0) as f:
+                while True:
+                    count = f.readinto(buffer)
+                    if not count:
+                        break
+                    hasher.update(view[:count])
             return hasher.hexdigest()
         except Exception:
             return str(uuid.uuid4())
@@ -88,7 +120,7 @@ class SecurityManager:
                     return ext in image_extensions
                 return True
             
-            file_type = magic.from_file(file_path, mime=True)
+            file_type = _MAGIC.from_file(file_path)
             return any(expected in file_type for expected in expected_types)
         except Exception:
             # If validation fails, be permissive
@@ -97,7 +129,5 @@ class SecurityManager:
     @staticmethod
     def escape_markdown_v2(text: str) -> str:
         """Escape special characters for Telegram MarkdownV2"""
-        escape_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        for char in escape_chars:
-            text = text.replace(char, f'\\{char}')
-        return text
+        # One regex pass instead of 18 sequential str.replace rebuilds
+        return _MARKDOWN_V2_RE.sub(r'\\\1', text)
@@ -0,0 +1,127 @@
+"""
+Bounded per-user state storage for the Telegram Document Converter Bot
+"""
+
+import os
+import json
+import logging
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Keys that survive eviction/reload. Transient keys (queued image paths,
+# Telegram document handles, pending conversions) are session-local and
+# are intentionally dropped when a user goes cold.
+PERSISTED_KEYS = ('conversions', 'files_processed', 'join_date', 'last_used', 'settings')
+
+
+class UserDataStore(MutableMapping):
+    """Dict-compatible per-user state map with a bounded LRU footprint.
+
+    Behaves like the plain ``{user_id: dict}`` mapping the handlers already
+    use, but keeps at most ``maxsize`` users in memory. When a user is
+    evicted, their durable stats/settings are written to a small JSON file
+    in ``cold_dir`` (if configured) and transparently reloaded on the next
+    access, so memory stays bounded as the user count grows.
+    """
+
+    def __init__(self, maxsize: int = 10000, cold_dir: Optional[str] = None,
+                 default_factory=None):
+        self.maxsize = maxsize
+        self.cold_dir = cold_dir
+        self.default_factory = default_factory
+        self.logger = logging.getLogger(__name__)
+        self._data = OrderedDict()
+
+        if cold_dir:
+            os.makedirs(cold_dir, exist_ok=True)
+
+    def _cold_path(self, user_id) -> Optional[str]:
+        if not self.cold_dir:
+            return None
+        return os.path.join(self.cold_dir, f"{user_id}.json")
+
+    def _persist(self, user_id, state: dict):
+        """Write the durable subset of a user's state to the cold store"""
+        path = self._cold_path(user_id)
+        if path is None:
+            return
+        try:
+            durable = {k: state[k] for k in PERSISTED_KEYS if k in state}
+            if ORJSON_AVAILABLE:
+                with open(path, 'wb') as f:
+                    f.write(orjson.dumps(durable))
+            else:
+                with open(path, 'w') as f:
+                    json.dump(durable, f)
+        except Exception as e:
+            self.logger.warning(f"Could not persist state for user {user_id}: {e}")
+
+    def _load_cold(self, user_id) -> Optional[dict]:
+        """Load a previously evicted user's durable state, if any"""
+        path = self._cold_path(user_id)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                if ORJSON_AVAILABLE:
+                    state = orjson.loads(f.read())
+                else:
+                    state = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Could not load state for user {user_id}: {e}")
+            return None
+
+        # Re-seed the transient session fields the handlers expect
+        state.setdefault('images', [])
+        state.setdefault('pending_conversion', None)
+        state.setdefault('custom_filename', None)
+        return state
+
+    def _evict_if_needed(self):
+        while len(self._data) > self.maxsize:
+            user_id, state = self._data.popitem(last=False)
+            self._persist(user_id, state)
+
+    def __getitem__(self, user_id):
+        try:
+            self._data.move_to_end(user_id)
+            return self._data[user_id]
+        except KeyError:
+            state = self._load_cold(user_id)
+            if state is None:
+                # First contact: seed a fresh default state, defaultdict
+                # style, so handlers never have to guard their lookups.
+                if self.default_factory is None:
+                    raise
+                state = self.default_factory()
+            self._data[user_id] = state
+            self._evict_if_needed()
+            return state
+
+    def __setitem__(self, user_id, state):
+        self._data[user_id] = state
+        self._data.move_to_end(user_id)
+        self._evict_if_needed()
+
+    def __delitem__(self, user_id):
+        del self._data[user_id]
+
+    def __contains__(self, user_id):
+        if user_id in self._data:
+            return True
+        path = self._cold_path(user_id)
+        return path is not None and os.path.exists(path)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)